@@ -1,101 +1,70 @@
-import geoip2.database
-from flask import Flask, jsonify, redirect, request
-from rapidfuzz import process
-from user_agents import parse as parse_user_agent
+import os
+import time
+
+from flask import Flask, Response, jsonify, redirect, request, stream_with_context
+from flask.json.provider import JSONProvider
+
+from converter.utils.device_utils import user_agent_cache_stats
+from converter.utils.district_utils import BANGLADESH_DISTRICTS, detect_language
+from converter.utils.json_codec import dumps, dumps_bytes, loads
+from enrichment import (asn_cache, classify_district_fuzzy, district_matcher, enrich_request,
+                        lookup_asn, reader)
+from features import validate_order
+from metrics import CONTENT_TYPE, METRICS_ENABLED, observe_request, registry
+from model import DEFAULT_ARTIFACT_PATH
+from retraining import ModelSlot, model_gauges
+
+class CodecJSONProvider(JSONProvider):
+    """jsonify and request.get_json through the shared JSON codec (orjson when installed)"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
+
+# Orders scored per predict_batch call on the bulk endpoint
+BULK_CHUNK_SIZE = 1000
+
+# Serving model and its compiled scorer. They are loaded at import when an
+# artifact exists, so prefork servers (gunicorn --preload) load them once and
+# workers share the pages copy-on-write; otherwise on first scoring request.
+# Each process then reloads them when a new version is saved to the artifact.
+model_slot = ModelSlot(DEFAULT_ARTIFACT_PATH)
 
-# Load ASN DB
-try:
-    reader = geoip2.database.Reader('GeoLite2-ASN.mmdb')
-except FileNotFoundError:
-    print("GeoLite2-ASN.mmdb file not found. ASN lookup will be disabled.")
-    reader = None
-
-# Bangladesh Districts List
-BANGLADESH_DISTRICTS = [
-    {"en": "Bagerhat", "bn": "বাগেরহাট"},
-    {"en": "Bandarban", "bn": "বান্দরবান"},
-    {"en": "Barguna", "bn": "বরগুনা"},
-    {"en": "Barisal", "bn": "বরিশাল"},
-    {"en": "Bhola", "bn": "ভোলা"},
-    {"en": "Bogra", "bn": "বগুড়া"},
-    {"en": "Brahmanbaria", "bn": "ব্রাহ্মণবাড়িয়া"},
-    {"en": "Chandpur", "bn": "চাঁদপুর"},
-    {"en": "Chapai Nawabganj", "bn": "চাঁপাইনবাবগঞ্জ"},
-    {"en": "Chattogram", "bn": "চট্টগ্রাম"},
-    {"en": "Chuadanga", "bn": "চুয়াডাঙ্গা"},
-    {"en": "Comilla", "bn": "কুমিল্লা"},
-    {"en": "Cox's Bazar", "bn": "কক্সবাজার"},
-    {"en": "Dhaka", "bn": "ঢাকা"},
-    {"en": "Dinajpur", "bn": "দিনাজপুর"},
-    {"en": "Faridpur", "bn": "ফরিদপুর"},
-    {"en": "Feni", "bn": "ফেনী"},
-    {"en": "Gaibandha", "bn": "গাইবান্ধা"},
-    {"en": "Gazipur", "bn": "গাজীপুর"},
-    {"en": "Gopalganj", "bn": "গোপালগঞ্জ"},
-    {"en": "Habiganj", "bn": "হবিগঞ্জ"},
-    {"en": "Jamalpur", "bn": "জামালপুর"},
-    {"en": "Jashore", "bn": "যশোর"},
-    {"en": "Jhalokathi", "bn": "ঝালকাঠি"},
-    {"en": "Jhenaidah", "bn": "ঝিনাইদহ"},
-    {"en": "Joypurhat", "bn": "জয়পুরহাট"},
-    {"en": "Khagrachhari", "bn": "খাগড়াছড়ি"},
-    {"en": "Khulna", "bn": "খুলনা"},
-    {"en": "Kishoreganj", "bn": "কিশোরগঞ্জ"},
-    {"en": "Kurigram", "bn": "কুড়িগ্রাম"},
-    {"en": "Kushtia", "bn": "কুষ্টিয়া"},
-    {"en": "Lakshmipur", "bn": "লক্ষ্মীপুর"},
-    {"en": "Lalmonirhat", "bn": "লালমনিরহাট"},
-    {"en": "Madaripur", "bn": "মাদারীপুর"},
-    {"en": "Magura", "bn": "মাগুরা"},
-    {"en": "Manikganj", "bn": "মানিকগঞ্জ"},
-    {"en": "Meherpur", "bn": "মেহেরপুর"},
-    {"en": "Moulvibazar", "bn": "মৌলভীবাজার"},
-    {"en": "Munshiganj", "bn": "মুন্সীগঞ্জ"},
-    {"en": "Mymensingh", "bn": "ময়মনসিংহ"},
-    {"en": "Naogaon", "bn": "নওগাঁ"},
-    {"en": "Narail", "bn": "নড়াইল"},
-    {"en": "Narayanganj", "bn": "নারায়ণগঞ্জ"},
-    {"en": "Narsingdi", "bn": "নরসিংদী"},
-    {"en": "Natore", "bn": "নাটোর"},
-    {"en": "Netrokona", "bn": "নেত্রকোনা"},
-    {"en": "Nilphamari", "bn": "নীলফামারী"},
-    {"en": "Noakhali", "bn": "নোয়াখালী"},
-    {"en": "Pabna", "bn": "পাবনা"},
-    {"en": "Panchagarh", "bn": "পঞ্চগড়"},
-    {"en": "Patuakhali", "bn": "পটুয়াখালী"},
-    {"en": "Pirojpur", "bn": "পিরোজপুর"},
-    {"en": "Rajbari", "bn": "রাজবাড়ী"},
-    {"en": "Rajshahi", "bn": "রাজশাহী"},
-    {"en": "Rangamati", "bn": "রাঙ্গামাটি"},
-    {"en": "Rangpur", "bn": "রংপুর"},
-    {"en": "Satkhira", "bn": "সাতক্ষীরা"},
-    {"en": "Shariatpur", "bn": "শরীয়তপুর"},
-    {"en": "Sherpur", "bn": "শেরপুর"},
-    {"en": "Sirajganj", "bn": "সিরাজগঞ্জ"},
-    {"en": "Sunamganj", "bn": "সুনামগঞ্জ"},
-    {"en": "Sylhet", "bn": "সিলেট"},
-    {"en": "Tangail", "bn": "টাঙ্গাইল"},
-    {"en": "Thakurgaon", "bn": "ঠাকুরগাঁও"}
-]
-
-def detect_language(text):
-    for ch in text:
-        if '০' <= ch <= '৯' or 'অ' <= ch <= 'ঔ' or 'ক' <= ch <= 'হ':
-            return 'bn'
-    return 'en'
-
-def classify_district_fuzzy(address, threshold=80):
-    if not address:
-        return None
-    language = detect_language(address)
-    district_list = [d[language] for d in BANGLADESH_DISTRICTS]
-    best_match = process.extractOne(address, district_list)
-    if best_match and best_match[1] >= threshold:
-        idx = best_match[2]
-        return BANGLADESH_DISTRICTS[idx]['en']
-    return None
+def get_fraud_model():
+    return model_slot.current().model
+
+if os.path.isdir(DEFAULT_ARTIFACT_PATH):
+    # load(), not current(): a reload thread in the gunicorn master would be forked mid-swap
+    model_slot.load()
+
+if METRICS_ENABLED:
+    model_gauges(model_slot)
+
+    @app.before_request
+    def start_timer():
+        request.start_time = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        # Streamed responses (/predict/bulk) are timed until the stream starts
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(endpoint, response.status_code, time.perf_counter() - request.start_time)
+        return response
+
+@app.route('/metrics')
+def metrics():
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'metrics are disabled (METRICS_ENABLED=0)'}), 404
+    return Response(registry.render(), content_type=CONTENT_TYPE)
 
 @app.route('/')
 def home():
@@ -105,42 +74,103 @@ def home():
 def handle_order():
     ip = request.headers.get('X-Forwarded-For', request.remote_addr)
     user_agent_string = request.headers.get('User-Agent', '')
-    ua = parse_user_agent(user_agent_string)
-
-    # ASN Info
-    if reader:
-        try:
-            asn_info = reader.asn(ip)
-            asn = {
-                'asn': asn_info.autonomous_system_number,
-                'org': asn_info.autonomous_system_organization
-            }
-        except:
-            asn = {'asn': None, 'org': 'Unknown'}
-    else:
-        asn = {'asn': None, 'org': 'Unavailable'}
-
-    # Device Info
-    device = {
-        'is_mobile': int(ua.is_mobile),
-        'is_pc': int(ua.is_pc),
-        'is_tablet': int(ua.is_tablet),
-        'browser': ua.browser.family,
-        'os': ua.os.family,
-        'device': ua.device.family
-    }
 
     # Location Guess (Optional Address Input)
     address = request.args.get('address') or request.form.get('address', '')
-    district = classify_district_fuzzy(address) if address else None
-
-    return jsonify({
-        'ip': ip,
-        'user_agent': user_agent_string,
-        'asn': asn,
-        'device_info': device,
-        'district_detected': district
+
+    return jsonify(enrich_request(ip, user_agent_string, address))
+
+@app.route('/score', methods=['POST'])
+def score_order():
+    """Enrich one order and score it in a single request
+
+    The body is the order JSON. Its ip, user_agent and address fields are
+    enriched like /order; ip and user_agent default to the caller's.
+    """
+    order = request.get_json(force=True, silent=True)
+    if not isinstance(order, dict):
+        return jsonify({'error': 'expected a JSON order object'}), 400
+    try:
+        validate_order(order)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    ip = order.get('ip') or request.headers.get('X-Forwarded-For', request.remote_addr)
+    user_agent_string = order.get('user_agent') or request.headers.get('User-Agent', '')
+    enriched = enrich_request(ip, user_agent_string, order.get('address', ''))
+
+    # One read of the slot, so a concurrent reload cannot mix two versions
+    model, scorer = model_slot.current()
+    prediction = scorer.predict(model.merge_enrichment(order, enriched))
+    response = jsonify({
+        **enriched,
+        'prediction': prediction,
+        'model_version': model.version
     })
+    response.headers['X-Model-Version'] = model.version
+    return response
+
+@app.route('/stats/cache')
+def cache_stats():
+    return jsonify({'asn': asn_cache.stats(), 'user_agent': user_agent_cache_stats()})
+
+def iter_ndjson_orders(stream):
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            raise ValueError(f"invalid JSON on line {line_number}")
+
+@app.route('/predict/bulk', methods=['POST'])
+def predict_bulk():
+    """Score many orders sent as NDJSON or a JSON array, streaming NDJSON back"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        orders = iter_ndjson_orders(request.stream)
+    else:
+        payload = request.get_json(force=True, silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('orders')
+        if not isinstance(payload, list):
+            return jsonify({'error': 'expected a JSON array of orders or NDJSON'}), 400
+        orders = payload
+
+    model = get_fraud_model()
+
+    def score(chunk):
+        # predict_batch runs before any line is yielded, so a failing chunk sends nothing partial
+        return [dumps_bytes(result) + b'\n' for result in model.predict_batch(chunk)]
+
+    def generate():
+        # Headers are already sent, so a bad order ends the stream with an error line
+        chunk = []
+        error = None
+        try:
+            for position, order in enumerate(orders, start=1):
+                try:
+                    validate_order(order)
+                except ValueError as e:
+                    raise ValueError(f"order {position}: {e}")
+                chunk.append(order)
+                if len(chunk) == BULK_CHUNK_SIZE:
+                    full, chunk = chunk, []
+                    yield from score(full)
+        except (TypeError, ValueError) as e:
+            error = str(e)
+        # What is left in chunk was validated, including the orders before an invalid one
+        if chunk:
+            try:
+                yield from score(chunk)
+            except (TypeError, ValueError) as e:
+                error = error or str(e)
+        if error:
+            yield dumps_bytes({'error': error}) + b'\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Model-Version'] = model.version
+    return response
 
 if __name__ == "__main__":
     app.run(debug=True)
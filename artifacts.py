@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+# Estimator classes an artifact may contain, by name
+ESTIMATOR_CLASSES = {
+    cls.__name__: cls
+    for cls in (StandardScaler, LogisticRegression, SGDClassifier)
+}
+
+# Fitted attributes persisted for those estimators, when present
+FITTED_ATTRIBUTES = [
+    'mean_', 'scale_', 'var_', 'n_samples_seen_',
+    'coef_', 'intercept_', 'classes_', 'n_iter_', 't_', 'n_features_in_',
+]
+
+# Model attributes stored in an artifact
+COMPONENTS = ['scaler', 'cancellation_model', 'fraud_model']
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _to_json_scalar(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _write_array(path, name, array):
+    """Write one array as <name>.<sha>.npy and return its manifest entry"""
+    tmp_path = os.path.join(path, f'.{name}.tmp.npy')
+    np.save(tmp_path, np.ascontiguousarray(array), allow_pickle=False)
+    checksum = _sha256(tmp_path)
+    filename = f'{name}.{checksum[:12]}.npy'
+    os.replace(tmp_path, os.path.join(path, filename))
+    return {'file': filename, 'sha256': checksum}
+
+
+def _save_estimator(path, component, estimator):
+    state = {
+        'class': type(estimator).__name__,
+        'params': estimator.get_params(),
+        'arrays': {},
+        'scalars': {},
+    }
+    if state['class'] not in ESTIMATOR_CLASSES:
+        raise ArtifactError(f"cannot store estimator of type {state['class']}")
+    for attr in FITTED_ATTRIBUTES:
+        value = getattr(estimator, attr, None)
+        if value is None:
+            continue
+        if isinstance(value, np.ndarray):
+            state['arrays'][attr] = _write_array(path, f'{component}.{attr}', value)
+        else:
+            state['scalars'][attr] = _to_json_scalar(value)
+    return state
+
+
+def _load_estimator(path, state, mmap_mode, verify):
+    cls = ESTIMATOR_CLASSES.get(state['class'])
+    if cls is None:
+        raise ArtifactError(f"unknown estimator type {state['class']}")
+    estimator = cls(**state['params'])
+    for attr, entry in state['arrays'].items():
+        array_path = os.path.join(path, entry['file'])
+        if verify and _sha256(array_path) != entry['sha256']:
+            raise ArtifactError(f"checksum mismatch for {entry['file']}")
+        setattr(estimator, attr, np.load(array_path, mmap_mode=mmap_mode, allow_pickle=False))
+    for attr, value in state['scalars'].items():
+        setattr(estimator, attr, value)
+    return estimator
+
+
+def _referenced_files(manifest):
+    return {
+        entry['file']
+        for state in manifest['components'].values() for entry in state['arrays'].values()
+    }
+
+
+def save_artifact(model, path):
+    """Save a fitted FraudDetectionModel to an artifact directory
+
+    Arrays are written as content-addressed .npy files and the manifest is
+    replaced last, so a reader never sees a half-written artifact. The
+    previous version's arrays are kept until the next save, so a load()
+    that read the old manifest just before the swap can still open them.
+    """
+    try:
+        previous = _referenced_files(read_manifest(path))
+    except (ArtifactError, OSError, ValueError, KeyError):
+        previous = set()
+    if not model.is_fitted:
+        raise ArtifactError("cannot save a model that has not been fitted")
+    os.makedirs(path, exist_ok=True)
+
+    components = {
+        name: _save_estimator(path, name, getattr(model, name)) for name in COMPONENTS
+    }
+    checksums = sorted(
+        entry['sha256'] for state in components.values() for entry in state['arrays'].values()
+    )
+    schema = json.dumps([model.feature_columns, model.metadata], sort_keys=True)
+    version = hashlib.sha256((schema + ''.join(checksums)).encode()).hexdigest()[:12]
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model_version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'feature_columns': list(model.feature_columns),
+        'metadata': model.metadata,
+        'components': components,
+    }
+    tmp_manifest = os.path.join(path, f'.{MANIFEST_NAME}.tmp')
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, os.path.join(path, MANIFEST_NAME))
+
+    # Drop array files older than the previous version; open memory maps stay valid on POSIX
+    referenced = _referenced_files(manifest) | previous
+    for filename in os.listdir(path):
+        if filename.endswith('.npy') and filename not in referenced:
+            os.remove(os.path.join(path, filename))
+
+    model.version = version
+    return version
+
+
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f"no model artifact found at {path}")
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(
+            f"unsupported artifact format {manifest.get('format_version')}, "
+            f"expected {ARTIFACT_FORMAT_VERSION}"
+        )
+    return manifest
+
+
+def load_artifact(model, path, mmap_mode='r', verify=True):
+    """Restore a fitted FraudDetectionModel from an artifact directory"""
+    manifest = read_manifest(path)
+    components = {
+        name: _load_estimator(path, manifest['components'][name], mmap_mode, verify)
+        for name in COMPONENTS
+    }
+    for name, estimator in components.items():
+        setattr(model, name, estimator)
+    model.set_metadata(manifest['metadata'])
+    model.feature_columns = manifest['feature_columns']
+    model.version = manifest['model_version']
+    model.is_fitted = True
+    return model
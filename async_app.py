@@ -0,0 +1,156 @@
+"""asyncio front end for /order and /score with dynamic micro-batching
+
+Concurrent requests are collected into micro-batches (see batching.py), so
+each batch costs one classify_many pass and, for /score, one vectorised
+score_batch call instead of one call per request. Run with:
+
+    python async_app.py
+    gunicorn async_app:app_factory --worker-class aiohttp.GunicornWebWorker -c gunicorn.conf.py
+"""
+import os
+import time
+
+from aiohttp import web
+
+from app import model_slot
+from batching import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT, MicroBatcher
+from converter.utils.device_utils import user_agent_cache_stats
+from converter.utils.json_codec import dumps_bytes, loads
+from enrichment import asn_cache, enrich_many
+from features import validate_order
+from metrics import CONTENT_TYPE, METRICS_ENABLED, observe_request, registry
+
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', DEFAULT_MAX_BATCH_SIZE))
+BATCH_MAX_WAIT = float(os.environ.get('BATCH_MAX_WAIT_MS', DEFAULT_MAX_WAIT * 1000)) / 1000
+
+ORDER_BATCHER = web.AppKey('order_batcher', MicroBatcher)
+SCORE_BATCHER = web.AppKey('score_batcher', MicroBatcher)
+
+# Batchers of the most recently created app, read by the batch gauges
+_batchers = {}
+
+if METRICS_ENABLED:
+    def _batcher_gauge(key):
+        return lambda: {(name,): batcher.stats()[key] for name, batcher in _batchers.items()}
+
+    registry.gauge('fraud_batches', 'Micro-batches processed', ('batcher',), _batcher_gauge('batches'))
+    registry.gauge('fraud_batched_requests', 'Requests processed in micro-batches', ('batcher',),
+                   _batcher_gauge('items'))
+    registry.gauge('fraud_batch_size_mean', 'Mean micro-batch size', ('batcher',),
+                   _batcher_gauge('mean_batch_size'))
+
+
+def score_many(items):
+    """Enrich and score a batch of (order, ip, user_agent) items"""
+    enriched = enrich_many([
+        (ip, user_agent_string, order.get('address', '')) for order, ip, user_agent_string in items
+    ])
+    model, scorer = model_slot.current()
+    predictions = scorer.predict_batch([
+        model.merge_enrichment(order, info) for (order, _, _), info in zip(items, enriched)
+    ])
+    return [
+        {**info, 'prediction': prediction, 'model_version': model.version}
+        for info, prediction in zip(enriched, predictions)
+    ]
+
+
+def json_response(data, status=200, headers=None):
+    """A JSON response encoded straight to bytes by the shared codec"""
+    return web.Response(body=dumps_bytes(data), status=status, headers=headers,
+                        content_type='application/json')
+
+
+def client_ip(request):
+    return request.headers.get('X-Forwarded-For', request.remote)
+
+
+@web.middleware
+async def record_request(request, handler):
+    start = time.perf_counter()
+    resource = request.match_info.route.resource
+    endpoint = resource.canonical if resource is not None else 'unmatched'
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        observe_request(endpoint, e.status, time.perf_counter() - start)
+        raise
+    except Exception:
+        observe_request(endpoint, 500, time.perf_counter() - start)
+        raise
+    observe_request(endpoint, response.status, time.perf_counter() - start)
+    return response
+
+
+async def metrics(request):
+    if not METRICS_ENABLED:
+        return json_response({'error': 'metrics are disabled (METRICS_ENABLED=0)'}, status=404)
+    return web.Response(body=registry.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def home(request):
+    return web.Response(text="✅ Welcome to the Order Info API. Use the /order endpoint.")
+
+
+async def handle_order(request):
+    address = request.query.get('address')
+    if not address and request.method == 'POST':
+        address = (await request.post()).get('address', '')
+    enriched = await request.app[ORDER_BATCHER].submit(
+        (client_ip(request), request.headers.get('User-Agent', ''), address or '')
+    )
+    return json_response(enriched)
+
+
+async def score_order(request):
+    """Same contract as app.py's /score"""
+    try:
+        order = loads(await request.read())
+    except ValueError:
+        order = None
+    if not isinstance(order, dict):
+        return json_response({'error': 'expected a JSON order object'}, status=400)
+    try:
+        validate_order(order)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    ip = order.get('ip') or client_ip(request)
+    user_agent_string = order.get('user_agent') or request.headers.get('User-Agent', '')
+    result = await request.app[SCORE_BATCHER].submit((order, ip, user_agent_string))
+    return json_response(result, headers={'X-Model-Version': result['model_version']})
+
+
+async def cache_stats(request):
+    return json_response({'asn': asn_cache.stats(), 'user_agent': user_agent_cache_stats()})
+
+
+async def batching_stats(request):
+    return json_response({
+        'order': request.app[ORDER_BATCHER].stats(),
+        'score': request.app[SCORE_BATCHER].stats()
+    })
+
+
+def create_app(max_batch_size=BATCH_MAX_SIZE, max_wait=BATCH_MAX_WAIT):
+    app = web.Application(middlewares=[record_request] if METRICS_ENABLED else [])
+    app[ORDER_BATCHER] = _batchers['order'] = MicroBatcher(enrich_many, max_batch_size, max_wait)
+    app[SCORE_BATCHER] = _batchers['score'] = MicroBatcher(score_many, max_batch_size, max_wait)
+    app.router.add_get('/', home)
+    app.router.add_route('GET', '/order', handle_order)
+    app.router.add_route('POST', '/order', handle_order)
+    app.router.add_post('/score', score_order)
+    app.router.add_get('/stats/cache', cache_stats)
+    app.router.add_get('/stats/batching', batching_stats)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+
+async def app_factory():
+    """create_app() with the default settings, for aiohttp.GunicornWebWorker"""
+    return create_app()
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=os.environ.get('HOST', '127.0.0.1'),
+                port=int(os.environ.get('PORT', '5000')))
@@ -0,0 +1,89 @@
+import asyncio
+
+# Defaults for the async front end; both overridable per batcher
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT = 0.002    # seconds the first request of a batch may wait
+
+
+class MicroBatcher:
+    """Collect concurrent asyncio requests into batches for one process() call
+
+    process(items) receives a list and must return one result per item, in
+    order. A batch is flushed when it reaches max_batch_size or when its
+    first item has waited max_wait seconds, so batching adds at most
+    max_wait to a request's latency. While traffic is sequential (the last
+    batch held one item) the wait is skipped and the batch is flushed on the
+    next loop iteration, so a lone caller pays no batching delay. If process
+    raises on a batch, its items are processed again one at a time and only
+    the callers whose item fails on its own get the exception. process runs
+    on the event loop, so it should be CPU work only; requests arriving
+    meanwhile queue for the next batch.
+    """
+
+    def __init__(self, process, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self._last_batch_size = 0
+        self.counters = {
+            "batches": 0,
+            "items": 0,
+            "full_batches": 0,
+            "retried_batches": 0,
+            "errors": 0,
+        }
+
+    async def submit(self, item):
+        """Queue item for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.counters["full_batches"] += 1
+            self._flush()
+        elif self._timer is None:
+            wait = self.max_wait if self._last_batch_size > 1 else 0
+            self._timer = loop.call_later(wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        # Callers that gave up (e.g. client disconnects) are dropped from the batch
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self._last_batch_size = len(batch)
+        self.counters["batches"] += 1
+        self.counters["items"] += len(batch)
+        try:
+            results = self.process([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self.counters["errors"] += 1
+                batch[0][1].set_exception(e)
+                return
+            # Retry one by one, so only the items that fail on their own get the error
+            self.counters["retried_batches"] += 1
+            for item, future in batch:
+                try:
+                    future.set_result(self.process([item])[0])
+                except Exception as e:
+                    self.counters["errors"] += 1
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        """Counters plus the mean batch size so far"""
+        stats = dict(self.counters)
+        stats["mean_batch_size"] = stats["items"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
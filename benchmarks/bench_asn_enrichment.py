@@ -0,0 +1,58 @@
+"""ASN enrichment wall time: sequential vs pooled concurrent vs local GeoLite2 lookups
+
+Runs against a local stub of ipinfo.io, so no network access is needed.
+Run from the repository root:  python -m benchmarks.bench_asn_enrichment
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.stub_ipinfo import StubIpinfoServer
+from converter.utils.asn_utils import get_asn_info, get_asn_infos, make_session
+from converter.utils.cache import LookupCache
+from converter.utils.geoip_utils import get_asn_reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ips', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=0.02, help='stub response delay in seconds')
+    parser.add_argument('--fail-every', type=int, default=50, help='answer every Nth request with 503')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16, 64])
+    args = parser.parse_args()
+
+    # One IP per /24 block, so the ASN cache cannot collapse lookups
+    ips = [f'10.{i // 256}.{i % 256}.1' for i in range(args.ips)]
+
+    with StubIpinfoServer(args.delay, args.fail_every) as stub, \
+            contextlib.redirect_stdout(io.StringIO()):
+        rows = []
+        # Baseline: the old behaviour, one new connection per lookup, one at a time
+        start = time.perf_counter()
+        for ip in ips:
+            get_asn_info(ip, session=make_session(1), url=stub.url, retries=0)
+        rows.append(('sequential, no keep-alive', time.perf_counter() - start))
+
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            # A fresh memory-only cache per run, so every IP goes to the stub
+            results = get_asn_infos(ips, provider='http', concurrency=concurrency,
+                                    cache=LookupCache('bench'), url=stub.url, backoff=0.01)
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for info in results.values() if not info['asn_number'])
+            rows.append((f'pooled, concurrency {concurrency} ({failed} failed)', elapsed))
+
+        if get_asn_reader() is not None:
+            start = time.perf_counter()
+            get_asn_infos(ips, provider='mmdb')
+            rows.append(('local GeoLite2 (mmdb)', time.perf_counter() - start))
+
+    print(f"{args.ips} IPs, {args.delay * 1000:.0f} ms stub latency")
+    print(f"{'mode':40} {'seconds':>8} {'IPs/s':>8}")
+    for name, elapsed in rows:
+        print(f"{name:40} {elapsed:8.2f} {args.ips / elapsed:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
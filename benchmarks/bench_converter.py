@@ -0,0 +1,43 @@
+"""Converter pipeline throughput and peak memory by input size
+
+Run from the repository root:  python -m benchmarks.bench_converter
+ASN lookups use the local GeoLite2 provider (ASN_PROVIDER=mmdb), so no
+network access is needed.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import load_converter, write_raw_page_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--format', choices=['ndjson', 'parquet'], default='ndjson')
+    args = parser.parse_args()
+
+    converter = load_converter()
+    print(f"{'orders':>8} {'input MiB':>10} {'rows/s':>10} {'peak MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            input_path = os.path.join(tmp, f'orders_{n}.json')
+            output_path = os.path.join(tmp, f'enriched_{n}.{args.format}')
+            write_raw_page_file(input_path, n)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            with converter.open_writer(output_path, args.format) as writer:
+                rows = converter.run([input_path], writer)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            size = os.path.getsize(input_path) / 2**20
+            print(f"{rows:8d} {size:10.1f} {rows / elapsed:10.0f} {peak / 2**20:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
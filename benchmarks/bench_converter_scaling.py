@@ -0,0 +1,55 @@
+"""Converter throughput from 1 to N enrichment processes
+
+Runs converter/main.py once per worker count on synthetic page files (the
+paginated API layout) and on one NDJSON file, and reports rows/s and
+speedup over one worker.
+Run from the repository root:  python -m benchmarks.bench_converter_scaling
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import CONVERTER_DIR, write_raw_ndjson, write_raw_pages
+
+
+def rows_per_second(inputs, workers, chunk_size):
+    result = subprocess.run(
+        [sys.executable, os.path.join(CONVERTER_DIR, 'main.py'), *inputs,
+         '-o', os.devnull, '-j', str(workers), '--chunk-size', str(chunk_size)],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, 'ASN_CACHE_PATH': ''},
+    )
+    return float(re.search(r'\(([\d.]+) rows/s\)', result.stderr).group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    worker_counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i < args.max_workers], args.max_workers})
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = {
+            'pages': write_raw_pages(tmp, args.orders, args.page_size),
+            'ndjson': [os.path.join(tmp, 'orders.ndjson')],
+        }
+        write_raw_ndjson(inputs['ndjson'][0], args.orders)
+
+        print(f"{args.orders} orders, {os.cpu_count()} CPUs")
+        print(f"{'input':8} {'workers':>8} {'rows/s':>10} {'speedup':>8}")
+        for name, paths in inputs.items():
+            baseline = None
+            for workers in worker_counts:
+                rate = rows_per_second(paths, workers, args.chunk_size)
+                baseline = baseline or rate
+                print(f"{name:8} {workers:8d} {rate:10.0f} {rate / baseline:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
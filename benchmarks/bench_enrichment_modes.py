@@ -0,0 +1,98 @@
+"""predict_from_api latency per enrichment mode
+
+Compares in-process enrichment with calling app.py's /order over HTTP, both
+with a pooled keep-alive client and with a new connection per call (the old
+behaviour). The app is served locally on an ephemeral port.
+Run from the repository root:  python -m benchmarks.bench_enrichment_modes
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+import enrichment
+from app import app
+from benchmarks.synthetic import BANGLADESH_DISTRICTS, sample_user_agents, train_model, write_training_file
+
+
+def request_orders(n, seed=42):
+    rng = random.Random(seed)
+    user_agents = sample_user_agents(n, seed)
+    return [
+        {
+            'order_value': rng.randint(500, 20000),
+            'cart_item_count': rng.randint(1, 15),
+            'product_category': rng.choice(['clothing', 'cosmetics', 'electronics', 'groceries']),
+            'order_day': 'monday',
+            'order_hour': rng.randint(0, 23),
+            'customer_phone_prefix': '017',
+            'coupon_used': False,
+            'ip': f"103.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            'user_agent': user_agents[i],
+            'address': f"House {rng.randint(1, 99)}, {rng.choice(BANGLADESH_DISTRICTS)['en']}",
+        }
+        for i in range(n)
+    ]
+
+
+class UnpooledEnricher(enrichment.RemoteEnricher):
+    """The old client: a fresh connection for every request"""
+
+    def enrich(self, ip, user_agent_string, address):
+        response = requests.get(
+            self.api_url, params={'address': address},
+            headers={'User-Agent': user_agent_string, 'X-Forwarded-For': ip}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+def latencies_us(model, orders, api_url):
+    samples = []
+    for order in orders:
+        start = time.perf_counter()
+        model.predict_from_api(order, api_url=api_url)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, 5000)
+        model = train_model(data_path)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f'http://127.0.0.1:{server.server_port}/order'
+    unpooled_url = api_url + '?unpooled'
+    enrichment._remote_enrichers[unpooled_url] = UnpooledEnricher(api_url)
+
+    orders = request_orders(args.requests)
+    modes = [('in-process', ''), ('remote, pooled', api_url), ('remote, new connection', unpooled_url)]
+    print(f"{args.requests} predictions")
+    print(f"{'mode':24} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    try:
+        for name, url in modes:
+            latencies_us(model, orders[:50], url)  # warm caches and connections
+            samples = sorted(latencies_us(model, orders, url))
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            print(f"{name:24} {statistics.median(samples):10.0f} {p99:10.0f} {statistics.fmean(samples):10.0f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
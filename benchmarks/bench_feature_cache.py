@@ -0,0 +1,49 @@
+"""train() on an unchanged data file: cold vs feature-cache hit
+
+Run from the repository root:  python -m benchmarks.bench_feature_cache
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import feature_cache
+from benchmarks.synthetic import write_training_file
+from model import FraudDetectionModel
+
+
+def timed_train(data_path, sparse):
+    model = FraudDetectionModel()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y = model.encode_file(data_path, sparse=sparse)
+        encoded = time.perf_counter()
+        model.fit_matrix(X, y)
+    end = time.perf_counter()
+    return encoded - start, end - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, args.orders)
+        # A private cache, so earlier runs cannot turn the cold run into a hit
+        feature_cache._feature_cache = feature_cache.FeatureCache(os.path.join(tmp, 'cache'))
+
+        print(f"{args.orders} orders, {os.path.getsize(data_path) / 2**20:.0f} MiB JSON")
+        print(f"{'run':18} {'preprocess s':>13} {'train s':>9}")
+        for sparse in (False, True):
+            label = 'sparse' if sparse else 'dense'
+            for run in ('cold', 'cached'):
+                preprocess, total = timed_train(data_path, sparse)
+                print(f"{label + ', ' + run:18} {preprocess:13.2f} {total:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Training input cost: converter feature store (memory-mapped Arrow) vs NDJSON
+
+Run from the repository root:  python -m benchmarks.bench_feature_store
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import load_converter, write_raw_pages
+from converter.utils.feature_store import open_store
+from model import FraudDetectionModel
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000)
+    args = parser.parse_args()
+
+    converter = load_converter()
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = write_raw_pages(tmp, args.orders)
+        store_path = os.path.join(tmp, 'features.feather')
+        ndjson_path = os.path.join(tmp, 'features.ndjson')
+        for path, output_format in ((store_path, 'feather'), (ndjson_path, 'ndjson')):
+            with converter.open_writer(path, output_format) as writer:
+                converter.run(pages, writer)
+
+        model = FraudDetectionModel()
+        table, open_time = timed(lambda: open_store(store_path))
+        _, store_encode_time = timed(lambda: model.encoder.columns_from_store(table))
+
+        def parse_ndjson():
+            with open(ndjson_path) as f:
+                return [json.loads(line) for line in f]
+        _, ndjson_time = timed(parse_ndjson)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, train_time = timed(lambda: model.train_from_store(store_path))
+
+    print(f"{args.orders} enriched orders")
+    print(f"{'stage':36} {'seconds':>8}")
+    print(f"{'open feature store (mmap)':36} {open_time:8.4f}")
+    print(f"{'store -> code columns':36} {store_encode_time:8.4f}")
+    print(f"{'parse the same rows from NDJSON':36} {ndjson_time:8.4f}")
+    print(f"{'train_from_store (total)':36} {train_time:8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Hashed high-cardinality features: model size and scoring cost as distinct values grow
+
+For each cardinality the ASN, device family and 5-digit phone prefix take
+that many distinct values. "one-hot cols" is how many columns one-hot
+encoding those values would need; with hashing the feature count stays at
+the base columns plus --width.
+
+Run from the repository root:  python -m benchmarks.bench_hashed_features
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import add_hashed_fields, generate_orders
+from features import HASHED_FIELDS
+from model import FraudDetectionModel
+
+
+def distinct_values(orders):
+    fields = [field for field in HASHED_FIELDS if field != 'asn_number']
+    values = {(field, order[field]) for order in orders for field in fields}
+    values |= {('asn_number', order['asn']['asn']) for order in orders}
+    return len(values)
+
+
+def artifact_bytes(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        model.save(tmp)
+        return sum(entry.stat().st_size for entry in os.scandir(tmp) if entry.is_file())
+
+
+def per_order_us(fn, orders, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(orders)
+        best = min(best, time.perf_counter() - start)
+    return best / len(orders) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--width', type=int, default=1024)
+    parser.add_argument('--cardinalities', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--score-orders', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.orders} training orders, hash width {args.width}")
+    print(f"{'distinct':>9} {'one-hot cols':>13} {'features':>9} {'artifact KiB':>13} "
+          f"{'fit s':>7} {'score us':>9} {'batch us':>9}")
+    for cardinality in args.cardinalities:
+        orders = add_hashed_fields(generate_orders(args.orders), cardinality)
+        holdout = add_hashed_fields(generate_orders(args.score_orders, seed=7), cardinality, seed=7)
+
+        model = FraudDetectionModel()
+        model.set_metadata({**model.metadata, 'hash_width': args.width})
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.fit(orders)
+        fit_seconds = time.perf_counter() - start
+
+        scorer = model.compile_scorer()
+        score_us = per_order_us(lambda batch: [scorer.score(order) for order in batch], holdout)
+        batch_us = per_order_us(scorer.score_batch, holdout)
+        print(f"{cardinality:9d} {distinct_values(orders):13d} {model.encoder.n_features:9d} "
+              f"{artifact_bytes(model) / 1024:13.1f} {fit_seconds:7.2f} {score_us:9.2f} {batch_us:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""JSON encode/decode cost per order: stdlib vs orjson, at this service's payload shapes
+
+Run from the repository root:  python -m benchmarks.bench_json_codec
+"""
+import argparse
+import itertools
+import time
+
+from benchmarks.bench_enrichment_modes import request_orders
+from benchmarks.synthetic import generate_orders, generate_raw_orders
+from converter.utils.json_codec import OrjsonCodec, StdlibCodec
+from enrichment import enrich_request
+from model import FraudDetectionModel
+
+
+def per_item_us(func, items, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def payloads(n):
+    """(shape name, direction, objects) for the hot paths"""
+    model = FraudDetectionModel()
+    requests = request_orders(n)
+    enriched = [enrich_request(o['ip'], o['user_agent'], o['address']) for o in requests]
+    scored = [{**e, 'prediction': {'cancellation_probability': 0.12, 'fraud_probability': 0.03,
+                                   'likely_cancelled': False, 'likely_fraud': False},
+               'model_version': '65fd094e7a7b'} for e in enriched]
+    raw = list(itertools.islice(generate_raw_orders(n), n))
+    training = generate_orders(n)
+    # Converter output rows, without running the converter: merged model inputs are a close stand-in
+    rows = [model.merge_enrichment(o, e) for o, e in zip(requests, enriched)]
+    return [
+        ('/order response', 'encode', enriched),
+        ('/score request', 'decode', requests),
+        ('/score response', 'encode', scored),
+        ('converter raw order', 'decode', raw),
+        ('converter output row', 'encode', rows),
+        ('training order', 'decode', training),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    stdlib, fast = StdlibCodec(), OrjsonCodec()
+    print(f"{args.orders} objects per shape, best of {args.repeats}; microseconds per object")
+    print(f"{'shape':22} {'op':7} {'bytes':>6} {'stdlib':>8} {'orjson':>8} {'speedup':>8}")
+    for name, direction, objects in payloads(args.orders):
+        size = sum(len(stdlib.dumps_bytes(o)) for o in objects) // len(objects)
+        if direction == 'encode':
+            slow_us = per_item_us(stdlib.dumps_bytes, objects, args.repeats)
+            fast_us = per_item_us(fast.dumps_bytes, objects, args.repeats)
+        else:
+            encoded = [stdlib.dumps_bytes(o) for o in objects]
+            slow_us = per_item_us(stdlib.loads, encoded, args.repeats)
+            fast_us = per_item_us(fast.loads, encoded, args.repeats)
+        print(f"{name:22} {direction:7} {size:6d} {slow_us:8.2f} {fast_us:8.2f} {slow_us / fast_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
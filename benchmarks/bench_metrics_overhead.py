@@ -0,0 +1,73 @@
+"""Per-order cost of stage instrumentation: METRICS_ENABLED=1 vs 0
+
+Each mode runs in a fresh interpreter, because the switch is read at import.
+The timed loop is /score's work: enrich_request, merge_enrichment and a
+compiled-scorer prediction.
+Run from the repository root:  python -m benchmarks.bench_metrics_overhead
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_serving import ROOT
+
+
+def run_child(artifact_path, n, repeats):
+    from benchmarks.bench_enrichment_modes import request_orders
+    from enrichment import enrich_request
+    from model import FraudDetectionModel
+
+    model = FraudDetectionModel.load(artifact_path)
+    scorer = model.compile_scorer()
+    orders = request_orders(n)
+
+    def score_all():
+        for order in orders:
+            enriched = enrich_request(order['ip'], order['user_agent'], order['address'])
+            scorer.predict(model.merge_enrichment(order, enriched))
+
+    score_all()  # warm caches
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        score_all()
+        best = min(best, time.perf_counter() - start)
+    print(json.dumps({'us_per_order': best / n * 1e6}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child, args.orders, args.repeats)
+        return
+
+    from benchmarks.synthetic import train_model, write_training_file
+
+    print(f"{args.orders} orders, best of {args.repeats}")
+    print(f"{'metrics':10} {'us/order':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, 5000)
+        artifact_path = os.path.join(tmp, 'artifact')
+        train_model(data_path).save(artifact_path)
+        for enabled in ('0', '1'):
+            env = dict(os.environ, METRICS_ENABLED=enabled, ASN_CACHE_PATH='')
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_metrics_overhead', '--child', artifact_path,
+                 '--orders', str(args.orders), '--repeats', str(args.repeats)],
+                cwd=ROOT, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{'on' if enabled == '1' else 'off':10} {result['us_per_order']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
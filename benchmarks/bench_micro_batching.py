@@ -0,0 +1,97 @@
+"""Load test: async /score with and without micro-batching
+
+Serves async_app.py in a subprocess and drives /score with many concurrent
+clients, once with batching off (max batch size 1) and once with dynamic
+micro-batching, reporting requests/s and p50/p99 latency for each.
+Run from the repository root:  python -m benchmarks.bench_micro_batching
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+import requests
+
+from benchmarks.bench_enrichment_modes import request_orders
+from benchmarks.bench_serving import ROOT, free_port, wait_ready
+from benchmarks.synthetic import train_model, write_training_file
+
+
+async def run_load(url, orders, clients):
+    """Send orders with `clients` concurrent connections; return (seconds, latencies in ms)"""
+    latencies = []
+    queue = iter(orders)
+
+    async def client(session):
+        for order in queue:
+            start = time.perf_counter()
+            async with session.post(url, json=order) as response:
+                response.raise_for_status()
+                await response.read()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(clients)))  # warm up
+        queue = iter(orders)
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        return time.perf_counter() - start, latencies
+
+
+def serve(port, max_batch_size, max_wait_ms, env):
+    code = (
+        "from aiohttp import web; from async_app import create_app; "
+        f"web.run_app(create_app({max_batch_size}, {max_wait_ms / 1000}), "
+        f"host='127.0.0.1', port={port}, print=None)"
+    )
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_ready(f'http://127.0.0.1:{port}/stats/cache')
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    orders = request_orders(args.requests)
+    modes = [('unbatched', 1, 0.0), ('micro-batched', args.max_batch_size, args.max_wait_ms)]
+    print(f"{args.requests} requests, {args.clients} concurrent clients")
+    print(f"{'mode':14} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, 5000)
+        artifact_path = os.path.join(tmp, 'artifact')
+        train_model(data_path).save(artifact_path)
+        env = dict(os.environ, MODEL_ARTIFACT_PATH=artifact_path, ASN_CACHE_PATH='')
+
+        for name, max_batch_size, max_wait_ms in modes:
+            port = free_port()
+            server = serve(port, max_batch_size, max_wait_ms, env)
+            try:
+                elapsed, latencies = asyncio.run(
+                    run_load(f'http://127.0.0.1:{port}/score', orders, args.clients)
+                )
+                batching = requests.get(f'http://127.0.0.1:{port}/stats/batching').json()['score']
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{name:14} {len(orders) / elapsed:8.0f} {statistics.median(latencies):8.1f} "
+                  f"{p99:8.1f} {batching['mean_batch_size']:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
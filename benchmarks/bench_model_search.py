@@ -0,0 +1,57 @@
+"""Model selection time: one train() run per configuration vs train_search
+
+The baseline is today's tuning loop. It runs train() once per (solver, C)
+configuration, so the JSON is re-parsed and re-encoded and the fit is
+sequential and cold every time. train_search encodes and scales once and
+runs every fold and configuration in parallel with warm starts, doing
+5-fold CV on top.
+Run from the repository root:  python -m benchmarks.bench_model_search
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_training_file
+from model import FraudDetectionModel
+from model_selection import DEFAULT_CS, DEFAULT_FOLDS, DEFAULT_SOLVERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    configs = [(solver, C) for solver in DEFAULT_SOLVERS for C in DEFAULT_CS]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, args.orders)
+
+        start = time.perf_counter()
+        for solver, C in configs:
+            model = FraudDetectionModel()
+            model.cancellation_model.set_params(solver=solver, C=C, max_iter=1000)
+            model.fraud_model.set_params(solver=solver, C=C, max_iter=1000)
+            with contextlib.redirect_stdout(io.StringIO()):
+                model.train(data_path)
+        rerun = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            FraudDetectionModel().train_search(data_path, n_jobs=args.jobs)
+        search = time.perf_counter() - start
+
+    print(f"{args.orders} orders, {len(configs)} configurations, {os.cpu_count()} CPUs")
+    # Each fit trains both targets on one split of the data
+    search_fits = len(configs) * DEFAULT_FOLDS
+    print(f"{'approach':36} {'fits':>5} {'seconds':>8} {'s/fit':>7}")
+    print(f"{'train() per configuration':36} {len(configs):5d} {rerun:8.1f} {rerun / len(configs):7.2f}")
+    print(f"{f'train_search, {DEFAULT_FOLDS}-fold CV':36} {search_fits:5d} {search:8.1f} "
+          f"{search / search_fits:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Per-order scoring latency: predict vs predict_batch vs CompiledScorer
+
+Run from the repository root:  python -m benchmarks.bench_scoring
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_orders, train_model, write_training_file
+
+
+def per_order_us(fn, orders, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(orders)
+        best = min(best, time.perf_counter() - start)
+    return best / len(orders) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--train-size', type=int, default=20000)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, args.train_size)
+        model = train_model(data_path)
+
+    scorer = model.compile_scorer()
+    orders = generate_orders(args.orders, seed=7)
+
+    expected = np.array([[r['cancellation_probability'], r['fraud_probability']]
+                         for r in model.predict_batch(orders)])
+    single = np.array([scorer.score(order) for order in orders])
+    batch = scorer.score_batch(orders)
+    print(f"max |compiled - predict_batch|: single {np.abs(single - expected).max():.2e}, "
+          f"batch {np.abs(batch - expected).max():.2e}")
+
+    few = orders[:max(1, args.orders // 10)]
+    results = [
+        ('predict (one order per call)', per_order_us(lambda o: [model.predict(x) for x in o], few, args.repeat)),
+        ('predict_batch', per_order_us(model.predict_batch, orders, args.repeat)),
+        ('CompiledScorer.score', per_order_us(lambda o: [scorer.score(x) for x in o], orders, args.repeat)),
+        ('CompiledScorer.score_batch', per_order_us(scorer.score_batch, orders, args.repeat)),
+    ]
+    print(f"{'mode':32} {'us/order':>10}")
+    for name, us in results:
+        print(f"{name:32} {us:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
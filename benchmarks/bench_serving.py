@@ -0,0 +1,107 @@
+"""Scoring throughput: dev server + predict_from_api vs gunicorn /score
+
+The baseline is the single-threaded Flask dev server answering /order while
+the client scores with predict_from_api (two hops). The alternative is
+gunicorn with the model preloaded before fork, scoring in one /score call.
+Run from the repository root:  python -m benchmarks.bench_serving
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.bench_enrichment_modes import request_orders
+from benchmarks.synthetic import train_model, write_training_file
+from model import FraudDetectionModel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+def start_server(command, port, env):
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_ready(f'http://127.0.0.1:{port}/stats/cache')
+    return process
+
+
+def throughput(score, orders, clients):
+    """Orders per second with `clients` concurrent callers"""
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(score, orders[:50]))  # warm caches and connections
+        start = time.perf_counter()
+        list(pool.map(score, orders))
+        return len(orders) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    orders = request_orders(args.requests)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, 5000)
+        artifact_path = os.path.join(tmp, 'artifact')
+        train_model(data_path).save(artifact_path)
+        model = FraudDetectionModel.load(artifact_path)
+        env = dict(os.environ, MODEL_ARTIFACT_PATH=artifact_path, ASN_CACHE_PATH='')
+
+        port = free_port()
+        dev = start_server([sys.executable, '-c',
+                            f"from app import app; app.run(port={port}, threaded=False)"], port, env)
+        api_url = f'http://127.0.0.1:{port}/order'
+        try:
+            baseline = throughput(lambda order: model.predict_from_api(order, api_url=api_url),
+                                  orders, args.clients)
+        finally:
+            dev.terminate()
+            dev.wait()
+
+        port = free_port()
+        gunicorn = start_server([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                 '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+                                 'app:app'], port, env)
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=args.clients))
+        score_url = f'http://127.0.0.1:{port}/score'
+        try:
+            prefork = throughput(lambda order: session.post(score_url, json=order).json(),
+                                 orders, args.clients)
+        finally:
+            gunicorn.terminate()
+            gunicorn.wait()
+
+    print(f"{args.requests} orders, {args.clients} clients, {args.workers} gunicorn workers")
+    print(f"{'setup':36} {'orders/s':>10}")
+    print(f"{'dev server /order + predict_from_api':36} {baseline:10.0f}")
+    print(f"{'gunicorn preload /score':36} {prefork:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Peak training memory: dense vs sparse feature matrices
+
+Run from the repository root:  python -m benchmarks.bench_sparse_training
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.synthetic import generate_orders
+from model import FraudDetectionModel
+
+
+def measure(orders, sparse):
+    """Fit a fresh model and return (model, peak MiB allocated during fit, seconds)"""
+    model = FraudDetectionModel()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(orders, sparse=sparse)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, peak / 2**20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=500000)
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders)
+    dense_model, dense_peak, dense_time = measure(orders, sparse=False)
+    sparse_model, sparse_peak, sparse_time = measure(orders, sparse=True)
+
+    holdout = generate_orders(2000, seed=7)
+    dense = np.array([[r['cancellation_probability'], r['fraud_probability']]
+                      for r in dense_model.predict_batch(holdout)])
+    sparse = np.array([[r['cancellation_probability'], r['fraud_probability']]
+                       for r in sparse_model.predict_batch(holdout)])
+
+    print(f"{args.orders} orders, {dense_model.encoder.n_features} features")
+    print(f"{'mode':8} {'peak MiB':>10} {'fit s':>8}")
+    print(f"{'dense':8} {dense_peak:10.1f} {dense_time:8.2f}")
+    print(f"{'sparse':8} {sparse_peak:10.1f} {sparse_time:8.2f}")
+    print(f"max |sparse - dense| probability on holdout: {np.abs(sparse - dense).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Out-of-core training: throughput, peak memory and hold-out quality per chunk size
+
+Each streamed model is compared with train() (batch LogisticRegression) on
+the same orders, by ROC AUC and log-loss on a separate hold-out sample, and
+by the share of hold-out orders flagged likely_fraud.
+
+Run from the repository root:  python -m benchmarks.bench_streaming_training
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+
+import numpy as np
+from sklearn.metrics import log_loss, roc_auc_score
+
+from benchmarks.synthetic import generate_order, generate_orders
+from model import FraudDetectionModel
+
+
+def write_ndjson(path, n, seed=42):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for _ in range(n):
+            f.write(json.dumps(generate_order(rng)) + '\n')
+
+
+def holdout_quality(model, holdout):
+    """(cancellation AUC, fraud AUC, fraud log-loss, share flagged likely_fraud)"""
+    results = model.predict_batch(holdout)
+    cancel = np.array([r['cancellation_probability'] for r in results])
+    fraud = np.array([r['fraud_probability'] for r in results])
+    y_cancel = [o['was_cancelled'] for o in holdout]
+    y_fraud = [o['is_fraud'] for o in holdout]
+    return (roc_auc_score(y_cancel, cancel), roc_auc_score(y_fraud, fraud),
+            log_loss(y_fraud, fraud, labels=[False, True]), float(np.mean(fraud > 0.5)))
+
+
+def print_row(label, orders_per_second, peak_mib, quality):
+    cancel_auc, fraud_auc, fraud_loss, flagged = quality
+    print(f"{label:>10} {orders_per_second:12.0f} {peak_mib:10.1f} "
+          f"{cancel_auc:10.4f} {fraud_auc:10.4f} {fraud_loss:11.4f} {flagged:9.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=500000)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--holdout', type=int, default=20000)
+    args = parser.parse_args()
+
+    holdout = generate_orders(args.holdout, seed=7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'orders.ndjson')
+        write_ndjson(path, args.orders)
+
+        print(f"{args.orders} orders, {args.epochs} epoch(s), {args.holdout} hold-out orders")
+        print(f"{'chunk':>10} {'orders/s':>12} {'peak MiB':>10} {'cancel AUC':>10} "
+              f"{'fraud AUC':>10} {'fraud loss':>11} {'flagged':>9}")
+        for chunk_size in args.chunk_sizes:
+            model = FraudDetectionModel()
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = model.train_streaming(path, chunk_size=chunk_size, epochs=args.epochs)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print_row(str(chunk_size), stats['orders_per_second'], peak / 2**20,
+                      holdout_quality(model, holdout))
+
+        # Reference: train() fits LogisticRegression on all orders in memory
+        with open(path) as f:
+            orders = [json.loads(line) for line in f]
+        model = FraudDetectionModel()
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.fit(orders)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print_row('train()', float('nan'), peak / 2**20, holdout_quality(model, holdout))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Per-request user-agent parsing cost: uncached vs memoised
+
+Run from the repository root:  python -m benchmarks.bench_user_agent
+"""
+import argparse
+import time
+
+from user_agents import parse
+
+from benchmarks.synthetic import sample_user_agents
+from converter.utils.device_utils import parse_user_agent_fields, user_agent_cache_stats
+
+
+def uncached_fields(user_agent_str):
+    ua = parse(user_agent_str)
+    return (ua.browser.family, ua.os.family, ua.device.family, ua.is_mobile, ua.is_pc, ua.is_tablet)
+
+
+def per_request_us(fn, user_agents):
+    start = time.perf_counter()
+    for user_agent_str in user_agents:
+        fn(user_agent_str)
+    return (time.perf_counter() - start) / len(user_agents) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    user_agents = sample_user_agents(args.requests)
+    parse_user_agent_fields.cache_clear()
+
+    # Every string distinct, so no cache anywhere (ua-parser keeps its own) can help
+    cold = per_request_us(uncached_fields, [f"{ua} b/{i}" for i, ua in enumerate(user_agents[:2000])])
+    uncached = per_request_us(uncached_fields, user_agents)
+    cached = per_request_us(parse_user_agent_fields, user_agents)
+    stats = user_agent_cache_stats()
+
+    print(f"{args.requests} requests, {stats['size']} distinct user agents, "
+          f"hit rate {stats['hit_rate']:.2%}")
+    print(f"{'mode':12} {'us/request':>12}")
+    print(f"{'cold parse':12} {cold:12.2f}")
+    print(f"{'uncached':12} {uncached:12.2f}")
+    print(f"{'memoised':12} {cached:12.2f}")
+    print(f"saving: {uncached - cached:.2f} us/request ({uncached / cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Load generator for the /order and /score service
+
+Closed loop (--concurrency N): N clients each send their next request as
+soon as the previous one returns, which measures capacity. Open loop
+(--rate R): requests start on a fixed schedule of R per second whatever the
+server does, and latency is measured from the scheduled start, so queueing
+behind a slow server shows up in the percentiles instead of lowering the
+offered load.
+
+By default the app is started locally on an ephemeral port (--serve), with
+the ASN cache in memory and a synthetic model, so no network is needed.
+Request shapes follow test_client.py: a mix of Bangladeshi and documentation
+IP ranges, a skewed user-agent mix and English, Bengali, misspelled and
+empty addresses.
+
+Run from the repository root:
+    python -m benchmarks.loadtest --concurrency 32 --duration 20
+    python -m benchmarks.loadtest --rate 500 --duration 20 --serve gunicorn --endpoint /score
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --rate 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import aiohttp
+
+from benchmarks.bench_serving import ROOT, free_port, wait_ready
+from benchmarks.synthetic import generate_addresses, generate_orders, sample_user_agents
+
+SERVERS = {
+    'flask': lambda port: [sys.executable, '-c',
+                           f"from app import app; app.run(port={port}, threaded=True)"],
+    'async': lambda port: [sys.executable, '-c',
+                           "from aiohttp import web; from async_app import create_app; "
+                           f"web.run_app(create_app(), host='127.0.0.1', port={port}, print=None)"],
+    'gunicorn': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                              '--bind', f'127.0.0.1:{port}', 'app:app'],
+}
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def request_mix(n, seed=42):
+    """n (ip, user_agent, address, order) tuples in test_client.py's shapes"""
+    rng = random.Random(seed)
+    user_agents = sample_user_agents(n, seed)
+    english = generate_addresses(n, 'en', seed)
+    bengali = generate_addresses(n, 'bn', seed)
+    orders = generate_orders(n, seed)
+    mix = []
+    for i in range(n):
+        if rng.random() < 0.8:
+            ip = f"{rng.choice([27, 103, 114, 202])}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        else:
+            ip = f"203.0.113.{rng.randint(1, 255)}"
+        roll = rng.random()
+        address = '' if roll < 0.3 else bengali[i] if roll < 0.45 else english[i]
+        order = {key: value for key, value in orders[i].items() if key not in ('was_cancelled', 'is_fraud')}
+        order.update(ip=ip, user_agent=user_agents[i], address=address)
+        mix.append((ip, user_agents[i], address, order))
+    return mix
+
+
+def make_sender(session, base_url, endpoint):
+    url = base_url + endpoint
+
+    async def send(shape):
+        ip, user_agent, address, order = shape
+        headers = {'User-Agent': user_agent, 'X-Forwarded-For': ip}
+        if endpoint == '/score':
+            request = session.post(url, json=order, headers=headers)
+        else:
+            request = session.get(url, params={'address': address}, headers=headers)
+        async with request as response:
+            await response.read()
+            return response.status
+    return send
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = Counter()
+        self.sent = 0
+
+    async def record(self, send, shape, started):
+        self.sent += 1
+        try:
+            status = await send(shape)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.errors[type(e).__name__] += 1
+            return
+        if status >= 400:
+            self.errors[f'HTTP {status}'] += 1
+            return
+        self.latencies.append(time.perf_counter() - started)
+
+
+async def closed_loop(send, mix, concurrency, deadline, max_requests, recorder):
+    shapes = iter(range(max_requests or sys.maxsize))
+
+    async def client():
+        for i in shapes:
+            if time.perf_counter() >= deadline:
+                return
+            await recorder.record(send, mix[i % len(mix)], time.perf_counter())
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def open_loop(send, mix, rate, deadline, max_requests, recorder):
+    start = time.perf_counter()
+    tasks = set()
+    i = 0
+    while not max_requests or i < max_requests:
+        scheduled = start + i / rate
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Latency counts from the scheduled start, so a late send is not hidden
+        task = asyncio.ensure_future(recorder.record(send, mix[i % len(mix)], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        i += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run_load(args, base_url, mix):
+    recorder = Recorder()
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        send = make_sender(session, base_url, args.endpoint)
+        warmup = Recorder()
+        await closed_loop(send, mix, 4, time.perf_counter() + args.warmup, 0, warmup)
+
+        start = time.perf_counter()
+        deadline = start + args.duration
+        if args.rate:
+            await open_loop(send, mix, args.rate, deadline, args.requests, recorder)
+        else:
+            await closed_loop(send, mix, args.concurrency, deadline, args.requests, recorder)
+        elapsed = time.perf_counter() - start
+    return recorder, elapsed
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def summarize(args, recorder, elapsed):
+    latencies = sorted(recorder.latencies)
+    errors = sum(recorder.errors.values())
+    return {
+        'mode': f'open loop, {args.rate:g} req/s' if args.rate else f'closed loop, {args.concurrency} clients',
+        'endpoint': args.endpoint,
+        'duration_s': elapsed,
+        'sent': recorder.sent,
+        'completed': len(latencies),
+        'errors': dict(recorder.errors),
+        'error_rate': errors / recorder.sent if recorder.sent else 0.0,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            **{f'p{p:g}': percentile(latencies, p) * 1000 for p in PERCENTILES},
+            'max': latencies[-1] * 1000 if latencies else float('nan'),
+        },
+    }
+
+
+def print_summary(summary):
+    print(f"{summary['mode']} against {summary['endpoint']} for {summary['duration_s']:.1f} s")
+    print(f"  sent {summary['sent']}, completed {summary['completed']}, "
+          f"errors {sum(summary['errors'].values())} ({summary['error_rate']:.2%})")
+    for kind, count in sorted(summary['errors'].items()):
+        print(f"    {kind}: {count}")
+    print(f"  throughput {summary['throughput']:.0f} req/s")
+    print('  latency ms  ' + '  '.join(f"{name} {value:.2f}" for name, value in summary['latency_ms'].items()))
+
+
+def start_local_server(kind, tmp):
+    from benchmarks.synthetic import train_model, write_training_file
+
+    data_path = os.path.join(tmp, 'train.json')
+    write_training_file(data_path, 5000)
+    artifact_path = os.path.join(tmp, 'artifact')
+    train_model(data_path).save(artifact_path)
+    env = dict(os.environ, MODEL_ARTIFACT_PATH=artifact_path, ASN_CACHE_PATH='')
+    env.setdefault('ASN_PROVIDER', 'mmdb')
+    port = free_port()
+    process = subprocess.Popen(SERVERS[kind](port), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(base_url + '/stats/cache')
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=int, default=16, help='closed loop with this many clients')
+    load.add_argument('--rate', type=float, help='open loop at this many requests per second')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of measured load')
+    parser.add_argument('--requests', type=int, default=0, help='stop after this many requests (0: no limit)')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds of unmeasured load first')
+    parser.add_argument('--endpoint', choices=['/order', '/score'], default='/order')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='base URL of an already running server')
+    target.add_argument('--serve', choices=list(SERVERS), default='flask',
+                        help='start this server locally (default flask)')
+    parser.add_argument('--connections', type=int, default=256, help='client connection pool size')
+    parser.add_argument('--timeout', type=float, default=10.0, help='per-request timeout in seconds')
+    parser.add_argument('--mix-size', type=int, default=10000, help='distinct request shapes to cycle through')
+    parser.add_argument('--json', metavar='PATH', help='also write the summary as JSON')
+    args = parser.parse_args()
+
+    mix = request_mix(args.mix_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        base_url = args.url
+        if not base_url:
+            server, base_url = start_local_server(args.serve, tmp)
+        try:
+            recorder, elapsed = asyncio.run(run_load(args, base_url.rstrip('/'), mix))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    summary = summarize(args, recorder, elapsed)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubIpinfoServer:
+    """Local stand-in for ipinfo.io: answers /<ip>/json after a fixed delay
+
+    Every fail_every-th request gets a 503 so retries are exercised.
+    Use as a context manager; url is a template for get_asn_info(url=...).
+    """
+
+    def __init__(self, delay=0.02, fail_every=0):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            wbufsize = -1  # send headers and body in one write
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    count = stub.requests
+                time.sleep(stub.delay)
+                if stub.fail_every and count % stub.fail_every == 0:
+                    body, status = b'{}', 503
+                else:
+                    ip = self.path.strip('/').split('/')[0]
+                    asn = 1000 + sum(int(part) for part in ip.split('.') if part.isdigit())
+                    body, status = json.dumps({'ip': ip, 'org': f'AS{asn} Stub ISP'}).encode(), 200
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_port}/{{ip}}/json'
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,263 @@
+"""Reproducible benchmark suite with JSON results and regression checks
+
+Covers feature preprocessing, single and batch prediction, district
+matching over English and Bengali addresses, /order through the Flask test
+client and converter enrichment at several input sizes. All inputs come
+from seeded generators in benchmarks/synthetic.py, and nothing touches the
+network.
+
+Run from the repository root:
+    python -m benchmarks.suite -o baseline.json              # record a baseline
+    python -m benchmarks.suite --compare baseline.json       # run and check for regressions
+    python -m benchmarks.suite --compare baseline.json --results new.json   # compare two files
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SEED = 42
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_THRESHOLD = 0.10     # relative slowdown that counts as a regression
+DEFAULT_CONVERTER_SIZES = [1000, 100000, 1000000]
+
+
+def metric(value, unit, better):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def best_of(func, repeats):
+    """Shortest wall time of repeats calls to func()"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_call_us(func, items):
+    """(p50, p99) microseconds of func(item) over items"""
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+class Context:
+    """Inputs shared by the benchmarks, built once per run"""
+
+    def __init__(self, args, tmp):
+        from benchmarks.synthetic import generate_orders, train_model, write_training_file
+
+        self.args = args
+        self.tmp = tmp
+        self.orders = generate_orders(args.orders, seed=SEED)
+        data_path = os.path.join(tmp, 'train.json')
+        write_training_file(data_path, 5000, seed=SEED)
+        self.model = train_model(data_path)
+        self.scorer = self.model.compile_scorer()
+
+
+def bench_preprocess(ctx):
+    encoder = ctx.model.encoder
+    n = len(ctx.orders)
+    dense = best_of(lambda: encoder.encode(ctx.orders), ctx.args.repeats)
+    sparse = best_of(lambda: encoder.encode(ctx.orders, sparse=True), ctx.args.repeats)
+    return {
+        'preprocess.dense': metric(n / dense, 'orders/s', 'higher'),
+        'preprocess.sparse': metric(n / sparse, 'orders/s', 'higher'),
+    }
+
+
+def bench_predict(ctx):
+    single = ctx.orders[:2000]
+    model_p50, model_p99 = per_call_us(ctx.model.predict, single)
+    compiled_p50, compiled_p99 = per_call_us(ctx.scorer.predict, single)
+    batch = ctx.orders[:1000]
+    batch_seconds = best_of(lambda: ctx.model.predict_batch(batch), ctx.args.repeats)
+    compiled_batch_seconds = best_of(lambda: ctx.scorer.predict_batch(batch), ctx.args.repeats)
+    return {
+        'predict.single.p50': metric(model_p50, 'us', 'lower'),
+        'predict.single.p99': metric(model_p99, 'us', 'lower'),
+        'predict.compiled.p50': metric(compiled_p50, 'us', 'lower'),
+        'predict.compiled.p99': metric(compiled_p99, 'us', 'lower'),
+        'predict.batch_1000': metric(batch_seconds * 1000, 'ms', 'lower'),
+        'predict.compiled_batch_1000': metric(compiled_batch_seconds * 1000, 'ms', 'lower'),
+    }
+
+
+def bench_district(ctx):
+    from benchmarks.synthetic import generate_addresses
+    from enrichment import classify_district_fuzzy, district_matcher
+
+    results = {}
+    for language in ('en', 'bn'):
+        addresses = generate_addresses(2000, language, seed=SEED)
+        p50, p99 = per_call_us(classify_district_fuzzy, addresses)
+        many = best_of(lambda: district_matcher.classify_many(addresses, workers=1), ctx.args.repeats)
+        results[f'district.{language}.p50'] = metric(p50, 'us', 'lower')
+        results[f'district.{language}.p99'] = metric(p99, 'us', 'lower')
+        results[f'district.{language}.batch'] = metric(len(addresses) / many, 'addresses/s', 'higher')
+    return results
+
+
+def bench_order_endpoint(ctx):
+    from app import app
+    from benchmarks.synthetic import generate_addresses, sample_user_agents
+
+    client = app.test_client()
+    n = 2000
+    addresses = generate_addresses(n, seed=SEED)
+    user_agents = sample_user_agents(n, seed=SEED)
+    requests = [
+        {'query_string': {'address': address},
+         'headers': {'User-Agent': user_agent, 'X-Forwarded-For': f'103.{i % 256}.{i // 256 % 256}.1'}}
+        for i, (address, user_agent) in enumerate(zip(addresses, user_agents))
+    ]
+    per_call_us(lambda kwargs: client.get('/order', **kwargs), requests[:100])  # warm caches
+    start = time.perf_counter()
+    p50, p99 = per_call_us(lambda kwargs: client.get('/order', **kwargs), requests)
+    elapsed = time.perf_counter() - start
+    return {
+        'order_endpoint.p50': metric(p50, 'us', 'lower'),
+        'order_endpoint.p99': metric(p99, 'us', 'lower'),
+        'order_endpoint.throughput': metric(n / elapsed, 'requests/s', 'higher'),
+    }
+
+
+def bench_converter(ctx):
+    from benchmarks.synthetic import load_converter, write_raw_page_file
+
+    converter = load_converter()
+    results = {}
+    for n in ctx.args.converter_sizes:
+        input_path = os.path.join(ctx.tmp, f'raw_{n}.json')
+        output_path = os.path.join(ctx.tmp, f'enriched_{n}.ndjson')
+        write_raw_page_file(input_path, n, seed=SEED)
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            with converter.open_writer(output_path, 'ndjson') as writer:
+                rows = converter.run([input_path], writer)
+        elapsed = time.perf_counter() - start
+        results[f'converter.{n}'] = metric(rows / elapsed, 'rows/s', 'higher')
+        os.remove(input_path)
+        os.remove(output_path)
+    return results
+
+
+BENCHMARKS = {
+    'preprocess': bench_preprocess,
+    'predict': bench_predict,
+    'district': bench_district,
+    'order_endpoint': bench_order_endpoint,
+    'converter': bench_converter,
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': SEED,
+    }
+
+
+def run_suite(args):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = Context(args, tmp)
+        for name in args.only or BENCHMARKS:
+            print(f"running {name}...", file=sys.stderr)
+            results.update(BENCHMARKS[name](ctx))
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current, threshold):
+    """Print a comparison table; return the names of metrics that regressed"""
+    regressions = []
+    print(f"{'metric':32} {'baseline':>12} {'current':>12} {'change':>8}  unit")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base['value']:
+            print(f"{name:32} {'-':>12} {result['value']:12.1f} {'new':>8}  {result['unit']}")
+            continue
+        change = result['value'] / base['value'] - 1
+        # A positive slowdown means worse, whichever direction is better
+        slowdown = -change if result['better'] == 'higher' else change
+        flag = ''
+        if slowdown > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:32} {base['value']:12.1f} {result['value']:12.1f} {change:+8.1%}  {result['unit']}{flag}")
+    return regressions
+
+
+def print_results(report):
+    print(f"{'metric':32} {'value':>12}  unit")
+    for name, result in report['results'].items():
+        print(f"{name:32} {result['value']:12.1f}  {result['unit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help="where to save this run's results")
+    parser.add_argument('--compare', metavar='BASELINE', help='results file to check for regressions against')
+    parser.add_argument('--results', help='compare this saved results file instead of running the suite')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative slowdown flagged as a regression (default 0.10)')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='run only these benchmarks')
+    parser.add_argument('--orders', type=int, default=100000, help='orders for preprocess and predict')
+    parser.add_argument('--converter-sizes', type=int, nargs='+', default=DEFAULT_CONVERTER_SIZES)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help='small inputs for a fast smoke run')
+    args = parser.parse_args()
+    if args.quick:
+        args.orders = 10000
+        args.converter_sizes = [1000]
+        args.repeats = 1
+
+    if args.results:
+        with open(args.results) as f:
+            report = json.load(f)
+    else:
+        # Keep lookups in memory so runs neither read nor grow the ASN cache on disk
+        os.environ.setdefault('ASN_CACHE_PATH', '')
+        report = run_suite(args)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"saved results to {args.output}", file=sys.stderr)
+
+    if not args.compare:
+        print_results(report)
+        return
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, report, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
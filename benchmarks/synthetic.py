@@ -0,0 +1,214 @@
+import contextlib
+import copy
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+
+from model import BANGLADESH_DISTRICTS, FraudDetectionModel
+
+CONVERTER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'converter')
+
+PRODUCTS = ['clothing', 'cosmetics', 'electronics', 'groceries']
+DAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+PREFIXES = ['013', '015', '016', '017', '018', '019']
+BROWSERS = ['Chrome', 'Opera', 'Firefox', 'Safari', 'Edge', 'Samsung Internet']
+OS_LIST = ['Windows', 'Android', 'iOS', 'Mac OS X', 'Linux']
+DEVICES = ['phone', 'desktop', 'tablet']
+SIM_OPERATORS = ['Grameenphone', 'Banglalink', 'Teletalk', 'Airtel', 'Robi']
+EMAIL_PROVIDERS = ['gmail', 'yahoo', 'microsoft', 'apple', 'educational', 'other']
+
+# A realistic mix of the user agents seen on /order, most common first
+USER_AGENTS = [
+    "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 13; SM-A135F) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/23.0 Chrome/115.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; Redmi Note 11) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.6099.144 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 11; vivo 1906; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/87.0.4280.141 Mobile Safari/537.36 [FB_IAB/FB4A;FBAV/445.0.0.34.118;]",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0",
+    "Mozilla/5.0 (Linux; Android 10; Infinix X657) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36 OPR/79.0.2254.70",
+    "Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+]
+
+
+def sample_user_agents(n, seed=42):
+    """n user agents drawn with a skewed (roughly Zipf) popularity"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(USER_AGENTS))]
+    return rng.choices(USER_AGENTS, weights=weights, k=n)
+
+
+def generate_order(rng):
+    """Seeded variant of test_client.generate_test_order with enrichment fields and labels"""
+    order_value = rng.randint(500, 20000)
+    order_hour = rng.randint(0, 23)
+    coupon_used = rng.random() > 0.7
+    is_bangladesh = rng.random() > 0.1
+
+    # Labels loosely tied to the features so the models have something to learn
+    fraud_risk = 0.02 + 0.15 * (order_value > 15000) + 0.1 * (order_hour < 4) + 0.1 * (not is_bangladesh)
+    cancel_risk = 0.1 + 0.2 * coupon_used + 0.1 * (order_value > 10000)
+
+    return {
+        "order_value": order_value,
+        "cart_item_count": rng.randint(1, 15),
+        "product_category": rng.choice(PRODUCTS),
+        "order_day": rng.choice(DAYS),
+        "order_hour": order_hour,
+        "customer_phone_prefix": rng.choice(PREFIXES),
+        "coupon_used": coupon_used,
+        "asn": {"asn": f"AS{rng.randint(1000, 65000)}"} if rng.random() > 0.2 else {},
+        "is_bangladesh": is_bangladesh,
+        "browser": rng.choice(BROWSERS),
+        "os": rng.choice(OS_LIST),
+        "device_type": rng.choice(DEVICES),
+        "district": rng.choice(BANGLADESH_DISTRICTS)['en'] if rng.random() > 0.3 else "",
+        "was_cancelled": rng.random() < cancel_risk,
+        "is_fraud": rng.random() < fraud_risk,
+    }
+
+
+def generate_orders(n, seed=42):
+    rng = random.Random(seed)
+    return [generate_order(rng) for _ in range(n)]
+
+
+def add_hashed_fields(orders, cardinality, seed=42):
+    """Set the FeatureEncoder HASHED_FIELDS on orders in place
+
+    ASN, device family and 5-digit phone prefix are drawn from cardinality
+    distinct values each. A separate generator keeps generate_orders' stream
+    unchanged.
+    """
+    rng = random.Random(seed)
+    for order in orders:
+        order.update(
+            sim_operator=rng.choice(SIM_OPERATORS),
+            email_provider=rng.choice(EMAIL_PROVIDERS),
+            asn={"asn": f"AS{rng.randrange(cardinality) + 1000}"},
+            device_family=f"device-{rng.randrange(cardinality)}",
+            phone_number_prefix=f"{rng.randrange(cardinality):05d}",
+        )
+    return orders
+
+
+def _misspell(rng, word):
+    """Drop or swap one character so the word only matches fuzzily"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    if rng.random() < 0.5:
+        return word[:i] + word[i + 1:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def generate_addresses(n, language='en', seed=42, misspelled=0.3):
+    """Shipping addresses naming a district, in English or Bengali; some misspelled"""
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(n):
+        district = rng.choice(BANGLADESH_DISTRICTS)[language]
+        if rng.random() < misspelled:
+            district = _misspell(rng, district)
+        if language == 'bn':
+            addresses.append(f"বাড়ি {rng.randint(1, 99)}, রোড {rng.randint(1, 30)}, {district}")
+        else:
+            addresses.append(f"House {rng.randint(1, 99)}, Road {rng.randint(1, 30)}, {district}")
+    return addresses
+
+
+def write_training_file(path, n, seed=42):
+    with open(path, 'w') as f:
+        json.dump({"orders": generate_orders(n, seed)}, f)
+
+
+def train_model(data_path, **train_kwargs):
+    """Train a FraudDetectionModel without printing its evaluation report"""
+    model = FraudDetectionModel()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.train(data_path, **train_kwargs)
+    return model
+
+
+def load_converter():
+    """Import converter/main.py, which resolves its utils package from its own directory"""
+    if CONVERTER_DIR not in sys.path:
+        sys.path.insert(0, CONVERTER_DIR)
+    spec = importlib.util.spec_from_file_location('converter_main', os.path.join(CONVERTER_DIR, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _raw_order_template():
+    with open(os.path.join(CONVERTER_DIR, 'json_data.json')) as f:
+        return json.load(f)['data'][0]
+
+
+def generate_raw_orders(n, seed=42):
+    """Yield n orders in the converter's raw page-file shape, varied from json_data.json"""
+    rng = random.Random(seed)
+    template = _raw_order_template()
+    user_agents = sample_user_agents(n, seed)
+    for i in range(n):
+        order = copy.deepcopy(template)
+        district = rng.choice(BANGLADESH_DISTRICTS)['en']
+        order['amount']['total'] = rng.randint(200, 30000)
+        order['cart'] = order['cart'] * rng.randint(1, 4)
+        order['customer']['phone'] = f"+880{rng.choice(PREFIXES)[1:]}{rng.randint(10000000, 99999999)}"
+        order['customer']['email'] = f"user{i}@{rng.choice(['gmail.com', 'yahoo.com', 'outlook.com', 'shop.com.bd'])}"
+        order['shippingAddress'] = {
+            'streetAddress': f"House {rng.randint(1, 99)}, {district}",
+            'city': district,
+            'district': district if rng.random() > 0.2 else None,
+            'zipCode': None,
+        }
+        order['customerIpAddress'] = f"{rng.choice([27, 103, 114, 202])}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        order['customerUserAgent'] = user_agents[i]
+        order['status'] = 'cancelled' if rng.random() < 0.15 else rng.choice(['pending', 'delivered'])
+        order['labels'] = ['fraud'] if rng.random() < 0.05 else []
+        order['createAt'] = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.000Z"
+        yield order
+
+
+def _write_page(f, orders, page_number, page_size, total):
+    page = {'size': page_size, 'totalElements': total,
+            'totalPages': -(-total // page_size), 'pageNumber': page_number}
+    f.write(json.dumps({'page': page})[:-1])
+    f.write(', "data": [')
+    for i, order in enumerate(orders):
+        if i:
+            f.write(',\n')
+        f.write(json.dumps(order))
+    f.write(']}')
+
+
+def write_raw_page_file(path, n, seed=42):
+    """Write n raw orders as one {"page", "data"} file without holding them in memory"""
+    with open(path, 'w') as f:
+        _write_page(f, generate_raw_orders(n, seed), 1, n, n)
+
+
+def write_raw_pages(directory, n, page_size=1000, seed=42):
+    """Write n raw orders as page_size-order page files, like the paginated orders API; returns their paths"""
+    orders = generate_raw_orders(n, seed)
+    paths = []
+    for page_number, start in enumerate(range(0, n, page_size), start=1):
+        path = os.path.join(directory, f'page_{page_number:05d}.json')
+        with open(path, 'w') as f:
+            _write_page(f, (next(orders) for _ in range(min(page_size, n - start))), page_number, page_size, n)
+        paths.append(path)
+    return paths
+
+
+def write_raw_ndjson(path, n, seed=42):
+    with open(path, 'w') as f:
+        for order in generate_raw_orders(n, seed):
+            f.write(json.dumps(order) + '\n')
+
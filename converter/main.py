@@ -1,17 +1,33 @@
-import json
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Utility imports
-from utils.asn_utils import get_asn_info
+from utils.asn_utils import get_asn_cache, get_asn_infos
+from utils.geoip_utils import get_asn_reader
 from utils.device_utils import get_device_info
+from utils.district_utils import get_district_matcher
 from utils.email_utils import get_email_provider  # ✅ NEW IMPORT
+from utils.feature_store import arrow_schema
+from utils.json_codec import loads
+from utils.json_stream import iter_json_items, iter_ndjson
 from utils.location_utils import get_location_info
-from utils.phone_utils import get_operator_from_prefix
+from utils.phone_utils import get_operator_from_prefix, get_phone_prefix
 from utils.time_utils import extract_time_info
+from utils.writers import FeatherWriter, NdjsonWriter, ParquetWriter
 
-# Load JSON data
-with open("json_data.json") as f:
-    raw_data = json.load(f)
+DEFAULT_INPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_data.json")
+
+# Orders enriched together: one concurrent ASN batch and one district batch each
+DEFAULT_CHUNK_SIZE = 1000
+
+# ASN source (ASN_PROVIDER: mmdb, mmdb+http or http) and the concurrency
+# of ipinfo.io lookups over one keep-alive connection pool
+ASN_CONCURRENCY = int(os.environ.get("ASN_CONCURRENCY", "16"))
 
 # Normalization constants
 MIN_ORDER_TOTAL = 100
@@ -19,14 +35,40 @@ MAX_ORDER_TOTAL = 50000
 MIN_CART_ITEM_COUNT = 1
 MAX_CART_ITEM_COUNT = 10
 
+# Order statuses that count as a cancellation
+CANCELLED_STATUSES = {"cancelled", "canceled"}
+
 def normalize_order_total(order_total):
     return (order_total - MIN_ORDER_TOTAL) / (MAX_ORDER_TOTAL - MIN_ORDER_TOTAL)
 
 def normalize_cart_item_count(cart_item_count):
     return (cart_item_count - MIN_CART_ITEM_COUNT) / (MAX_CART_ITEM_COUNT - MIN_CART_ITEM_COUNT)
 
-# Process each order
-for order in raw_data["data"]:
+def shipping_address_text(order):
+    # The most specific field wins; street addresses often name a second district
+    address = order.get("shippingAddress") or {}
+    return address.get("district") or address.get("city") or address.get("streetAddress") or ""
+
+def read_orders(paths):
+    """Stream raw orders from page files ({"data": [...]}) or NDJSON files"""
+    for path in paths:
+        with open(path) as f:
+            if path.endswith((".ndjson", ".jsonl")):
+                yield from iter_ndjson(f)
+            else:
+                yield from iter_json_items(f, key="data")
+
+def iter_chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def enrich_order(order, asn_info, district_detected):
     order_total = order["amount"]["total"]
     cart_item_count = len(order["cart"])
     product_type = order["cart"][0]["product"]["product"]["type"] if order["cart"] else None
@@ -37,9 +79,7 @@ for order in raw_data["data"]:
     hour_of_day = created_at.hour
 
     # Phone processing
-    phone = order["customer"]["phone"]
-    local_phone = phone[3:] if phone.startswith("+88") else phone
-    phone_prefix = local_phone[:5]
+    phone_prefix = get_phone_prefix(order["customer"]["phone"])
     operator_name = get_operator_from_prefix(phone_prefix)
 
     # Email provider detection
@@ -47,7 +87,6 @@ for order in raw_data["data"]:
     email_provider = get_email_provider(email)
 
     # Enrich with utilities
-    asn_info = get_asn_info(order["customerIpAddress"])
     device_info = get_device_info(order["customerUserAgent"])
     location_info = get_location_info(order.get("shippingAddress", {}))
     time_info = extract_time_info(order)
@@ -55,7 +94,11 @@ for order in raw_data["data"]:
     order_total_stnd = normalize_order_total(order_total)
     cart_item_count_stnd = normalize_cart_item_count(cart_item_count)
 
-    enriched = {
+    # Training labels: the order status and the fraud label set on the order
+    was_cancelled = (order.get("status") or "").lower() in CANCELLED_STATUSES
+    is_fraud = any(str(label).lower() == "fraud" for label in order.get("labels") or [])
+
+    return {
         "order_total": order_total,
         "order_total_stnd": order_total_stnd,
         "cart_item_count": cart_item_count,
@@ -73,7 +116,129 @@ for order in raw_data["data"]:
         **asn_info,
         **device_info,
         **location_info,
-        **time_info
+        "district_detected": district_detected,
+        **time_info,
+        "was_cancelled": was_cancelled,
+        "is_fraud": is_fraud
     }
 
-    print(json.dumps(enriched, indent=2))
+def enrich_chunk(orders):
+    """Enrich a chunk of orders: one ASN batch, one district batch, then per-order fields"""
+    # Resolve every distinct customer IP in the chunk up front, concurrently
+    asn_infos = get_asn_infos(
+        [order["customerIpAddress"] for order in orders],
+        concurrency=ASN_CONCURRENCY
+    )
+    # Match every shipping address to a district in one batch
+    districts_detected = get_district_matcher().classify_many(
+        [shipping_address_text(order) for order in orders]
+    )
+    return [
+        enrich_order(order, asn_infos[order["customerIpAddress"]], district_detected)
+        for order, district_detected in zip(orders, districts_detected)
+    ]
+
+def init_worker():
+    """Build each worker's expensive shared state once, before its first task"""
+    get_asn_reader()
+    get_district_matcher()
+
+def iter_tasks(paths, chunk_size):
+    """
+    Split the input into tasks of chunk_size orders that workers decode and enrich
+
+    NDJSON is split into raw lines. Page files are streamed with the
+    incremental reader, which yields each order's JSON text, so a single
+    large page is spread over the pool like any NDJSON file.
+    """
+    for path in paths:
+        with open(path) as f:
+            if path.endswith((".ndjson", ".jsonl")):
+                for lines in iter_chunks(f, chunk_size):
+                    yield "lines", lines
+            else:
+                for texts in iter_chunks(iter_json_items(f, key="data", raw=True), chunk_size):
+                    yield "texts", texts
+
+def enrich_task(task):
+    """Decode and enrich one task's orders, returning only that chunk's rows"""
+    kind, payload = task
+    if kind == "lines":
+        orders = list(iter_ndjson(payload))
+    else:
+        orders = [loads(text) for text in payload]
+    return enrich_chunk(orders)
+
+def enrich_parallel(paths, chunk_size, workers):
+    """
+    Parse and enrich tasks over a process pool, yielding results in input order
+
+    At most two tasks per worker are in flight, so memory stays bounded by
+    the task size however long the input is.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        pending = deque()
+        for task in iter_tasks(paths, chunk_size):
+            pending.append(pool.submit(enrich_task, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run(paths, writer, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Stream orders through enrichment into writer; returns the number of rows
+
+    With workers > 1, chunks of NDJSON lines and of page-file orders are
+    parsed and enriched in that many processes and written in input order.
+    """
+    if workers > 1:
+        enriched_chunks = enrich_parallel(paths, chunk_size, workers)
+    else:
+        enriched_chunks = map(enrich_chunk, iter_chunks(read_orders(paths), chunk_size))
+    rows = 0
+    for enriched_chunk in enriched_chunks:
+        for enriched in enriched_chunk:
+            writer.write(enriched)
+        rows += len(enriched_chunk)
+    return rows
+
+def open_writer(output, output_format):
+    if output_format == "ndjson":
+        return NdjsonWriter(output)
+    if output == "-":
+        raise ValueError(f"{output_format} output needs a file path (--output)")
+    try:
+        schema = arrow_schema()
+    except ImportError:
+        raise ImportError(f"{output_format} output needs pyarrow: pip install pyarrow")
+    if output_format == "feather":
+        return FeatherWriter(output, schema)
+    return ParquetWriter(output, schema)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enrich raw orders into standardized features")
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_INPUT],
+                        help="page files ({\"data\": [...]}) or .ndjson files")
+    parser.add_argument("-o", "--output", default="-", help="output path, - for stdout")
+    parser.add_argument("-f", "--format", choices=["ndjson", "parquet", "feather"], default="ndjson")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="enrichment processes; 0 uses every core")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count()
+
+    start = time.perf_counter()
+    with open_writer(args.output, args.format) as writer:
+        rows = run(args.inputs, writer, args.chunk_size, workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"[converter] {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)",
+          file=sys.stderr)
+    if workers == 1:
+        # Worker processes keep their own caches
+        print(f"[ASN cache] {get_asn_cache().stats()}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
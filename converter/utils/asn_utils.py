@@ -1,36 +1,187 @@
 # utils/asn_utils.py
 
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import LookupCache, ip_block_key
+from .geoip_utils import get_asn_reader, reader_asn
+from .json_codec import loads
+
+IPINFO_URL = "https://ipinfo.io/{ip}/json"
+
+# Enrichment defaults; all overridable per call
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 5.0      # overall deadline per IP, including retries
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.2      # seconds, doubled after each failed attempt
+
+# Status codes worth retrying; anything else is answered as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+EMPTY_ASN = {"asn_number": "", "asn_name": ""}
+
+# "mmdb" resolves offline from GeoLite2 only; "mmdb+http" falls back to ipinfo.io
+# for addresses the database cannot answer; "http" uses ipinfo.io only
+ASN_PROVIDER = os.environ.get("ASN_PROVIDER", "mmdb")
+ASN_PROVIDERS = ("mmdb", "mmdb+http", "http")
+
+# Persistent ASN cache shared by all lookups; ASN_CACHE_PATH="" keeps it in memory
+ASN_CACHE_PATH = os.environ.get("ASN_CACHE_PATH", "asn_cache.sqlite")
+ASN_CACHE_TTL = float(os.environ.get("ASN_CACHE_TTL", "604800"))
+
+_local = threading.local()
+_asn_cache = None
+_asn_cache_lock = threading.Lock()
 
 
-def get_asn_info(ip):
+def get_asn_cache():
+    global _asn_cache
+    with _asn_cache_lock:
+        if _asn_cache is None:
+            _asn_cache = LookupCache("ipinfo_asn", ttl=ASN_CACHE_TTL, path=ASN_CACHE_PATH or None)
+        return _asn_cache
+
+
+def make_session(pool_size=DEFAULT_CONCURRENCY):
+    """A requests session whose keep-alive pool fits pool_size concurrent lookups"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _default_session():
+    # One pooled session per thread, so sequential callers also reuse connections
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = make_session(1)
+    return session
+
+
+def parse_org(org):
+    """Split an ipinfo org string like "AS17494 BDCOM Online Limited" """
+    asn_number = ""
+    asn_name = ""
+    if org and org.startswith("AS"):
+        parts = org.split(" ", 1)
+        asn_number = parts[0]
+        asn_name = parts[1] if len(parts) > 1 else ""
+    return {
+        "asn_number": asn_number,
+        "asn_name": asn_name
+    }
+
+
+def get_asn_info(ip, session=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, url=IPINFO_URL):
     """
     Dynamically fetch ASN info for a given IP address using ipinfo.io
+
+    Connection errors and retryable statuses are retried with exponential
+    backoff, but never past the overall timeout deadline.
     """
-    try:
-        url = f"https://ipinfo.io/{ip}/json"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-
-        data = response.json()
-        org = data.get("org", "")  # e.g., "AS17494 BDCOM Online Limited"
-
-        asn_number = ""
-        asn_name = ""
-
-        if org and org.startswith("AS"):
-            parts = org.split(" ", 1)
-            asn_number = parts[0]
-            asn_name = parts[1] if len(parts) > 1 else ""
-
-        return {
-            "asn_number": asn_number,
-            "asn_name": asn_name
-        }
-
-    except Exception as e:
-        print(f"[ASN Lookup Error] for IP {ip}: {e}")
-        return {
-            "asn_number": "",
-            "asn_name": ""
-        }
+    session = session or _default_session()
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            response = session.get(url.format(ip=ip), timeout=max(remaining, 0.001))
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return parse_org(loads(response.content).get("org", ""))
+            error = f"HTTP {response.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        except (requests.RequestException, ValueError) as e:
+            print(f"[ASN Lookup Error] for IP {ip}: {e}", file=sys.stderr)
+            return dict(EMPTY_ASN)
+
+        delay = backoff * (2 ** attempt)
+        if attempt >= retries or time.monotonic() + delay >= deadline:
+            print(f"[ASN Lookup Error] for IP {ip}: {error}", file=sys.stderr)
+            return dict(EMPTY_ASN)
+        attempt += 1
+        time.sleep(delay)
+
+
+def lookup_asn_info(ip, cache=None, **kwargs):
+    """
+    get_asn_info through the ASN cache, keyed by the IP's /24 or /48 block
+
+    Failed lookups are not cached. Extra keyword arguments are passed to
+    get_asn_info.
+    """
+    cache = cache or get_asn_cache()
+    return cache.get_or_compute(
+        ip_block_key(ip),
+        lambda: get_asn_info(ip, **kwargs),
+        should_cache=lambda info: bool(info["asn_number"])
+    )
+
+
+def get_local_asn_info(ip, reader=None):
+    """
+    ASN info for an IP from the local GeoLite2 database, in get_asn_info's shape
+
+    Returns None when the database is unavailable or has no answer.
+    """
+    reader = reader or get_asn_reader()
+    if reader is None:
+        return None
+    found = reader_asn(reader, ip)
+    if found is None or found[0] is None:
+        return None
+    number, org = found
+    return {
+        "asn_number": f"AS{number}",
+        "asn_name": org or ""
+    }
+
+
+def get_asn_infos(ips, provider=None, concurrency=DEFAULT_CONCURRENCY, cache=None, **kwargs):
+    """
+    Resolve many IPs, returning a dict of ip -> ASN info
+
+    Each distinct IP is resolved once. Local GeoLite2 lookups run inline;
+    IPs left to ipinfo.io (provider "http", or "mmdb+http" misses) are
+    fetched concurrently through the ASN cache over one keep-alive pool.
+    Extra keyword arguments are passed to get_asn_info.
+    """
+    provider = provider or ASN_PROVIDER
+    if provider not in ASN_PROVIDERS:
+        raise ValueError(f"unknown ASN provider {provider!r}, expected one of {ASN_PROVIDERS}")
+
+    unique_ips = list(dict.fromkeys(ips))
+    results = {}
+    remote_ips = unique_ips
+    if provider != "http":
+        reader = get_asn_reader()
+        remote_ips = []
+        for ip in unique_ips:
+            info = get_local_asn_info(ip, reader)
+            if info is not None:
+                results[ip] = info
+            elif provider == "mmdb+http":
+                remote_ips.append(ip)
+            else:
+                results[ip] = dict(EMPTY_ASN)
+    if not remote_ips:
+        return results
+
+    workers = max(1, min(concurrency, len(remote_ips)))
+    session = kwargs.pop("session", None) or make_session(workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fetched = pool.map(
+            lambda ip: lookup_asn_info(ip, cache=cache, session=session, **kwargs),
+            remote_ips
+        )
+        results.update(zip(remote_ips, fetched))
+    return results
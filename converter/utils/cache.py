@@ -0,0 +1,200 @@
+# utils/cache.py
+
+import ipaddress
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def ip_block_key(ip):
+    """Cache key for ASN lookups: the IP's /24 (IPv4) or /48 (IPv6) block
+
+    Those are the smallest prefixes announced in BGP, so every address in a
+    block belongs to the same autonomous system. Unparseable input is used as-is.
+    """
+    try:
+        address = ipaddress.ip_address(ip.strip())
+    except (AttributeError, ValueError):
+        return str(ip)
+    prefix = 24 if address.version == 4 else 48
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LookupCache:
+    """
+    Two-tier lookup cache: an in-process LRU with TTL in front of SQLite
+
+    Values must be JSON-serialisable. Concurrent misses on the same key are
+    coalesced, so compute runs once and every waiter gets its result. With
+    path=None the cache is memory-only.
+    """
+
+    def __init__(self, name, maxsize=10000, ttl=86400, path=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+        self._db = None
+        self._db_pid = None
+        if path:
+            db = self._connection()
+            db.execute(f'DELETE FROM "{name}" WHERE expires_at <= ?', (time.time(),))
+            db.commit()
+
+    def _connection(self):
+        # SQLite connections must not cross fork(); worker processes open their own
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" '
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _count(self, counter, n=1):
+        self.counters[counter] += n
+
+    def _get_memory(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            self._count("expirations")
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._count("evictions")
+
+    def _get_disk(self, key, now):
+        if not self.path:
+            return None
+        with self._db_lock:
+            row = self._connection().execute(
+                f'SELECT value, expires_at FROM "{self.name}" WHERE key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[1], json.loads(row[0])
+
+    def _put_disk(self, key, value, expires_at):
+        if not self.path:
+            return
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), expires_at)
+            )
+            db.commit()
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._get_memory(key, now)
+            if entry is not None:
+                self._count("hits")
+                return entry[1]
+        entry = self._get_disk(key, now)
+        if entry is None:
+            return None
+        with self._lock:
+            self._count("disk_hits")
+            self._put_memory(key, entry[1], entry[0])
+        return entry[1]
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+        self._put_disk(key, value, expires_at)
+
+    def get_or_compute(self, key, compute, should_cache=None):
+        """
+        Return the cached value for key, calling compute() once on a miss
+
+        Results for which should_cache(value) is false (e.g. failed lookups)
+        are returned to every waiter but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._count("misses")
+            else:
+                self._count("coalesced")
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if flight.value is not None and (should_cache is None or should_cache(flight.value)):
+                self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        """Counters plus the memory tier's size and hit rate"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            with self._db_lock:
+                db = self._connection()
+                db.execute(f'DELETE FROM "{self.name}"')
+                db.commit()
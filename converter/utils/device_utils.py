@@ -1,11 +1,52 @@
+from collections import namedtuple
+from functools import lru_cache
+
 from user_agents import parse
 
+# Distinct user-agent strings whose parsed fields are kept
+UA_CACHE_SIZE = 4096
+
+UserAgentFields = namedtuple(
+    "UserAgentFields", ["browser", "os", "device", "is_mobile", "is_pc", "is_tablet"]
+)
+
+
+@lru_cache(maxsize=UA_CACHE_SIZE)
+def parse_user_agent_fields(user_agent_str):
+    """
+    Parse a user-agent string once and keep only the fields we use
+
+    Results are memoised in a bounded, thread-safe LRU; the namedtuple is
+    immutable, so callers can share it safely.
+    """
+    ua = parse(user_agent_str or "")
+    return UserAgentFields(
+        browser=ua.browser.family,
+        os=ua.os.family,
+        device=ua.device.family,
+        is_mobile=ua.is_mobile,
+        is_pc=ua.is_pc,
+        is_tablet=ua.is_tablet
+    )
+
+
+def user_agent_cache_stats():
+    info = parse_user_agent_fields.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0
+    }
+
 
 def get_device_info(user_agent_str):
-    ua = parse(user_agent_str)
+    ua = parse_user_agent_fields(user_agent_str)
     return {
-        "user_browser": ua.browser.family,
-        "user_os_name": ua.os.family,
+        "user_browser": ua.browser,
+        "user_os_name": ua.os,
         "user_device_type": "Mobile" if ua.is_mobile else "PC" if ua.is_pc else "Other",
         "user_agent": user_agent_str
     }
@@ -0,0 +1,216 @@
+# utils/district_utils.py
+
+import re
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Bangladesh Districts List
+BANGLADESH_DISTRICTS = [
+    {"en": "Bagerhat", "bn": "বাগেরহাট"},
+    {"en": "Bandarban", "bn": "বান্দরবান"},
+    {"en": "Barguna", "bn": "বরগুনা"},
+    {"en": "Barisal", "bn": "বরিশাল"},
+    {"en": "Bhola", "bn": "ভোলা"},
+    {"en": "Bogra", "bn": "বগুড়া"},
+    {"en": "Brahmanbaria", "bn": "ব্রাহ্মণবাড়িয়া"},
+    {"en": "Chandpur", "bn": "চাঁদপুর"},
+    {"en": "Chapai Nawabganj", "bn": "চাঁপাইনবাবগঞ্জ"},
+    {"en": "Chattogram", "bn": "চট্টগ্রাম"},
+    {"en": "Chuadanga", "bn": "চুয়াডাঙ্গা"},
+    {"en": "Comilla", "bn": "কুমিল্লা"},
+    {"en": "Cox's Bazar", "bn": "কক্সবাজার"},
+    {"en": "Dhaka", "bn": "ঢাকা"},
+    {"en": "Dinajpur", "bn": "দিনাজপুর"},
+    {"en": "Faridpur", "bn": "ফরিদপুর"},
+    {"en": "Feni", "bn": "ফেনী"},
+    {"en": "Gaibandha", "bn": "গাইবান্ধা"},
+    {"en": "Gazipur", "bn": "গাজীপুর"},
+    {"en": "Gopalganj", "bn": "গোপালগঞ্জ"},
+    {"en": "Habiganj", "bn": "হবিগঞ্জ"},
+    {"en": "Jamalpur", "bn": "জামালপুর"},
+    {"en": "Jashore", "bn": "যশোর"},
+    {"en": "Jhalokathi", "bn": "ঝালকাঠি"},
+    {"en": "Jhenaidah", "bn": "ঝিনাইদহ"},
+    {"en": "Joypurhat", "bn": "জয়পুরহাট"},
+    {"en": "Khagrachhari", "bn": "খাগড়াছড়ি"},
+    {"en": "Khulna", "bn": "খুলনা"},
+    {"en": "Kishoreganj", "bn": "কিশোরগঞ্জ"},
+    {"en": "Kurigram", "bn": "কুড়িগ্রাম"},
+    {"en": "Kushtia", "bn": "কুষ্টিয়া"},
+    {"en": "Lakshmipur", "bn": "লক্ষ্মীপুর"},
+    {"en": "Lalmonirhat", "bn": "লালমনিরহাট"},
+    {"en": "Madaripur", "bn": "মাদারীপুর"},
+    {"en": "Magura", "bn": "মাগুরা"},
+    {"en": "Manikganj", "bn": "মানিকগঞ্জ"},
+    {"en": "Meherpur", "bn": "মেহেরপুর"},
+    {"en": "Moulvibazar", "bn": "মৌলভীবাজার"},
+    {"en": "Munshiganj", "bn": "মুন্সীগঞ্জ"},
+    {"en": "Mymensingh", "bn": "ময়মনসিংহ"},
+    {"en": "Naogaon", "bn": "নওগাঁ"},
+    {"en": "Narail", "bn": "নড়াইল"},
+    {"en": "Narayanganj", "bn": "নারায়ণগঞ্জ"},
+    {"en": "Narsingdi", "bn": "নরসিংদী"},
+    {"en": "Natore", "bn": "নাটোর"},
+    {"en": "Netrokona", "bn": "নেত্রকোনা"},
+    {"en": "Nilphamari", "bn": "নীলফামারী"},
+    {"en": "Noakhali", "bn": "নোয়াখালী"},
+    {"en": "Pabna", "bn": "পাবনা"},
+    {"en": "Panchagarh", "bn": "পঞ্চগড়"},
+    {"en": "Patuakhali", "bn": "পটুয়াখালী"},
+    {"en": "Pirojpur", "bn": "পিরোজপুর"},
+    {"en": "Rajbari", "bn": "রাজবাড়ী"},
+    {"en": "Rajshahi", "bn": "রাজশাহী"},
+    {"en": "Rangamati", "bn": "রাঙ্গামাটি"},
+    {"en": "Rangpur", "bn": "রংপুর"},
+    {"en": "Satkhira", "bn": "সাতক্ষীরা"},
+    {"en": "Shariatpur", "bn": "শরীয়তপুর"},
+    {"en": "Sherpur", "bn": "শেরপুর"},
+    {"en": "Sirajganj", "bn": "সিরাজগঞ্জ"},
+    {"en": "Sunamganj", "bn": "সুনামগঞ্জ"},
+    {"en": "Sylhet", "bn": "সিলেট"},
+    {"en": "Tangail", "bn": "টাঙ্গাইল"},
+    {"en": "Thakurgaon", "bn": "ঠাকুরগাঁও"}
+]
+
+# Other spellings seen in addresses, mapped to the English names above
+DISTRICT_ALIASES = {
+    "Barishal": "Barisal",
+    "Bogura": "Bogra",
+    "Chapainawabganj": "Chapai Nawabganj",
+    "Nawabganj": "Chapai Nawabganj",
+    "Chittagong": "Chattogram",
+    "Ctg": "Chattogram",
+    "Cumilla": "Comilla",
+    "Coxs Bazar": "Cox's Bazar",
+    "Coxsbazar": "Cox's Bazar",
+    "Dacca": "Dhaka",
+    "Jessore": "Jashore",
+    "Jhalakathi": "Jhalokathi",
+    "Jhalokati": "Jhalokathi",
+    "Maulvibazar": "Moulvibazar",
+    "Moulvi Bazar": "Moulvibazar",
+    "Netrakona": "Netrokona",
+    "Laxmipur": "Lakshmipur",
+}
+
+# Bengali digits, vowels and consonants; any of them marks an address as Bengali
+BENGALI_CHARS = re.compile("[০-৯অ-ঔক-হ]")
+
+# Separators between address tokens; Bengali vowel signs are not \w, so \W cannot be used
+TOKEN_SEPARATORS = re.compile(r"[\s,.;:/\\()\[\]|।#\-]+")
+
+# Longest district name in tokens, e.g. "chapai nawabganj"
+MAX_NAME_TOKENS = 3
+
+# Rows per rapidfuzz cdist call in classify_many
+BATCH_SIZE = 10000
+
+
+def detect_language(text):
+    return 'bn' if BENGALI_CHARS.search(text) else 'en'
+
+
+def _normalize(text):
+    return text.lower().replace("'", "").replace("’", "")
+
+
+def _tokens(text):
+    return [token for token in TOKEN_SEPARATORS.split(_normalize(text)) if token]
+
+
+class DistrictMatcher:
+    """
+    District classifier built once from a district list
+
+    Addresses that name exactly one district (in English, Bengali or a known
+    alias) are answered from a token index. Everything else falls back to
+    rapidfuzz WRatio against the per-language choice list, as before.
+    """
+
+    def __init__(self, districts=BANGLADESH_DISTRICTS, aliases=DISTRICT_ALIASES, threshold=80):
+        self.districts = [d["en"] for d in districts]
+        self.threshold = threshold
+        self.choices = {
+            language: [d[language] for d in districts] for language in ("en", "bn")
+        }
+
+        # Normalised name (one or more tokens) -> district index
+        self.index = {}
+        for i, district in enumerate(districts):
+            for name in (district["en"], district["bn"]):
+                self.index[" ".join(_tokens(name))] = i
+        position = {name: i for i, name in enumerate(self.districts)}
+        for alias, name in aliases.items():
+            self.index[" ".join(_tokens(alias))] = position[name]
+
+    def exact_match(self, address):
+        """Index of the one district the address names verbatim, or None"""
+        tokens = _tokens(address)
+        found = set()
+        for size in range(1, MAX_NAME_TOKENS + 1):
+            for start in range(len(tokens) - size + 1):
+                i = self.index.get(" ".join(tokens[start:start + size]))
+                if i is not None:
+                    found.add(i)
+        return found.pop() if len(found) == 1 else None
+
+    def classify(self, address, threshold=None):
+        """English name of the address's district, or None"""
+        if not address:
+            return None
+        threshold = self.threshold if threshold is None else threshold
+        i = self.exact_match(address)
+        if i is not None:
+            return self.districts[i]
+        best_match = process.extractOne(
+            address, self.choices[detect_language(address)], scorer=fuzz.WRatio
+        )
+        if best_match and best_match[1] >= threshold:
+            return self.districts[best_match[2]]
+        return None
+
+    def classify_many(self, addresses, threshold=None, workers=-1):
+        """
+        classify() for a whole column of addresses
+
+        Exact hits are resolved from the index; the rest are scored per
+        language with one rapidfuzz cdist call per BATCH_SIZE rows, spread
+        over workers threads (-1 uses every core).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        results = [None] * len(addresses)
+        pending = {"en": [], "bn": []}
+        for row, address in enumerate(addresses):
+            if not address:
+                continue
+            i = self.exact_match(address)
+            if i is not None:
+                results[row] = self.districts[i]
+            else:
+                pending[detect_language(address)].append(row)
+
+        for language, rows in pending.items():
+            for start in range(0, len(rows), BATCH_SIZE):
+                batch = rows[start:start + BATCH_SIZE]
+                scores = process.cdist(
+                    [addresses[row] for row in batch], self.choices[language],
+                    scorer=fuzz.WRatio, workers=workers
+                )
+                best = scores.argmax(axis=1)
+                best_scores = scores[np.arange(len(batch)), best]
+                for row, i, score in zip(batch, best, best_scores):
+                    if score >= threshold:
+                        results[row] = self.districts[i]
+        return results
+
+
+_matcher = None
+
+
+def get_district_matcher():
+    """Process-wide DistrictMatcher, built on first use"""
+    global _matcher
+    if _matcher is None:
+        _matcher = DistrictMatcher()
+    return _matcher
@@ -0,0 +1,67 @@
+# utils/feature_store.py
+
+# Bumped whenever ENRICHED_SCHEMA changes incompatibly
+FEATURE_STORE_VERSION = 1
+
+# Columns of an enriched order and their Arrow types, in output order
+ENRICHED_SCHEMA = [
+    ("order_total", "float64"),
+    ("order_total_stnd", "float64"),
+    ("cart_item_count", "int64"),
+    ("cart_item_count_stnd", "float64"),
+    ("product_type", "string"),
+    ("day_of_week", "string"),
+    ("day_of_month", "int64"),
+    ("hour_of_day", "int64"),
+    ("phone_number_prefix", "string"),
+    ("sim_operator", "string"),
+    ("email_provider", "string"),
+    ("is_coupon_used", "bool"),
+    ("merchant_return_rate", "float64"),
+    ("merchant_order_count", "int64"),
+    ("asn_number", "string"),
+    ("asn_name", "string"),
+    ("user_browser", "string"),
+    ("user_os_name", "string"),
+    ("user_device_type", "string"),
+    ("user_agent", "string"),
+    ("district", "string"),
+    ("district_detected", "string"),
+    ("was_cancelled", "bool"),
+    ("is_fraud", "bool"),
+]
+
+
+class FeatureStoreError(Exception):
+    pass
+
+
+def arrow_schema(schema=ENRICHED_SCHEMA):
+    import pyarrow as pa
+
+    return pa.schema(
+        [(name, pa.type_for_alias(type_name)) for name, type_name in schema],
+        metadata={"feature_store_version": str(FEATURE_STORE_VERSION)}
+    )
+
+
+def open_store(path):
+    """
+    Memory-map a feature store written by the converter (Arrow IPC / Feather v2)
+
+    The returned table's buffers point straight into the mapped file, so
+    opening it costs no parsing and no copies.
+    """
+    import pyarrow as pa
+
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    except FileNotFoundError:
+        raise FeatureStoreError(f"no feature store found at {path}")
+    metadata = reader.schema.metadata or {}
+    version = metadata.get(b"feature_store_version", b"").decode()
+    if version != str(FEATURE_STORE_VERSION):
+        raise FeatureStoreError(
+            f"unsupported feature store version {version or 'none'}, expected {FEATURE_STORE_VERSION}"
+        )
+    return reader.read_all()
@@ -0,0 +1,49 @@
+# utils/geoip_utils.py
+
+import os
+import sys
+import threading
+
+import geoip2.database
+import geoip2.errors
+
+# GeoLite2 ASN database; defaults to the copy in the repository root
+GEOLITE_ASN_PATH = os.environ.get(
+    "GEOLITE_ASN_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                 "GeoLite2-ASN.mmdb")
+)
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def get_asn_reader(path=GEOLITE_ASN_PATH):
+    """
+    Process-wide GeoLite2 ASN reader, opened once per path
+
+    Returns None when the database file is missing. The reader memory-maps
+    the file and is safe to share between threads.
+    """
+    with _readers_lock:
+        if path not in _readers:
+            try:
+                _readers[path] = geoip2.database.Reader(path)
+            except FileNotFoundError:
+                print(f"{os.path.basename(path)} file not found. ASN lookup will be disabled.", file=sys.stderr)
+                _readers[path] = None
+        return _readers[path]
+
+
+def reader_asn(reader, ip):
+    """
+    Look an IP up in a GeoLite2 ASN reader
+
+    Returns (asn number, organisation), or None if the address is not in
+    the database or is not a valid IP.
+    """
+    try:
+        record = reader.asn(ip)
+    except (geoip2.errors.AddressNotFoundError, ValueError):
+        return None
+    return record.autonomous_system_number, record.autonomous_system_organization
@@ -0,0 +1,83 @@
+# utils/json_codec.py
+
+import json
+import os
+
+# "auto" uses orjson when it is installed and the stdlib json module otherwise
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto")
+JSON_BACKENDS = ("auto", "orjson", "stdlib")
+
+
+def _default(obj):
+    # numpy scalars and arrays show up in scores and feature rows
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibCodec:
+    """The json module, with compact UTF-8 output matching OrjsonCodec's"""
+
+    name = "stdlib"
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return self._encoder.encode(obj)
+
+    def dumps_bytes(self, obj):
+        return self._encoder.encode(obj).encode("utf-8")
+
+
+class OrjsonCodec:
+    """orjson, which encodes straight to UTF-8 bytes and decodes str or bytes"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj):
+        return self._dumps(obj, default=_default, option=self._options).decode("utf-8")
+
+    def dumps_bytes(self, obj):
+        return self._dumps(obj, default=_default, option=self._options)
+
+
+def get_codec(backend=None):
+    """
+    A codec with loads(str | bytes), dumps(obj) -> str and dumps_bytes(obj) -> bytes
+
+    Both backends write compact, non-ASCII-escaped JSON and raise ValueError
+    subclasses on invalid input.
+    """
+    backend = backend or JSON_BACKEND
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"unknown JSON backend {backend!r}, expected one of {JSON_BACKENDS}")
+    if backend == "stdlib":
+        return StdlibCodec()
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        if backend == "orjson":
+            raise ImportError("JSON_BACKEND=orjson needs orjson: pip install orjson")
+        return StdlibCodec()
+
+
+codec = get_codec()
+loads = codec.loads
+dumps = codec.dumps
+dumps_bytes = codec.dumps_bytes
+
+
+def load(f):
+    """Decode a whole file opened in text or binary mode (binary skips a decode step)"""
+    return loads(f.read())
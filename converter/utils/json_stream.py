@@ -0,0 +1,117 @@
+# utils/json_stream.py
+
+import json
+import re
+
+from .json_codec import loads
+
+READ_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Characters that may continue a JSON number
+_NUMBER_CHARS = frozenset("-+.eE0123456789")
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    """Text read from a file on demand, decoded one JSON value at a time"""
+
+    def __init__(self, f):
+        self.f = f
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(READ_SIZE)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed so memory stays bounded by one value
+        self.text = self.text[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of input"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON input, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self, raw=False):
+        """Decode the next complete JSON value; raw=True returns its text instead"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # A number cut at the read boundary decodes as its prefix; it is
+                # complete only once a non-number character (or the end of input) follows
+                if self.eof or (end < len(self.text) and self.text[end] not in _NUMBER_CHARS):
+                    start, self.pos = self.pos, end
+                    return self.text[start:end] if raw else value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _iter_array(buffer, raw=False):
+    buffer.expect("[")
+    if buffer.peek() == "]":
+        buffer.pos += 1
+        return
+    while True:
+        yield buffer.value(raw)
+        char = buffer.peek()
+        buffer.pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"expected ',' or ']' in JSON array, got {char!r}")
+
+
+def iter_json_items(f, key="data", raw=False):
+    """
+    Yield the items of a JSON array one at a time from a text file
+
+    The array is either the whole document or the value of a top-level key
+    (e.g. "data" in a paginated page file). Other top-level values are
+    decoded and discarded, so memory holds one item, not the document.
+    With raw=True each item is yielded as its JSON text, for a consumer
+    that decodes it elsewhere (e.g. in a worker process).
+    """
+    buffer = _Buffer(f)
+    if buffer.peek() == "[":
+        yield from _iter_array(buffer, raw)
+        return
+
+    buffer.expect("{")
+    while buffer.peek() != "}":
+        name = buffer.value()
+        buffer.expect(":")
+        if name == key:
+            yield from _iter_array(buffer, raw)
+            return
+        buffer.value()
+        if buffer.peek() == ",":
+            buffer.pos += 1
+
+
+def iter_ndjson(f):
+    """Yield one JSON value per non-empty line"""
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            raise ValueError(f"invalid JSON on line {line_number}")
@@ -1,5 +1,10 @@
 # utils/phone_utils.py
 
+def get_phone_prefix(phone: str) -> str:
+    """The first 5 digits of the local number, e.g. "01712" for +8801712345678"""
+    local_phone = phone[3:] if phone.startswith("+88") else phone
+    return local_phone[:5]
+
 def get_operator_from_prefix(prefix: str) -> str:
     if prefix.startswith("013") or prefix.startswith("017"):
         return "Grameenphone"
@@ -0,0 +1,102 @@
+# utils/writers.py
+
+import sys
+
+from .json_codec import dumps_bytes
+
+# Rows buffered before each write
+DEFAULT_BUFFER_ROWS = 1000
+
+
+class NdjsonWriter:
+    """Buffered NDJSON writer; path "-" writes to stdout. Rows are encoded straight to bytes"""
+
+    def __init__(self, path, buffer_rows=DEFAULT_BUFFER_ROWS):
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self._f = sys.stdout.buffer if path == "-" else open(path, "wb", buffering=1 << 20)
+        self._lines = []
+
+    def write(self, row):
+        self._lines.append(dumps_bytes(row))
+        if len(self._lines) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self._f.write(b"\n".join(self._lines) + b"\n")
+            self._lines = []
+        self._f.flush()
+
+    def close(self):
+        self.flush()
+        if self._f is not sys.stdout.buffer:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ArrowWriter:
+    """Buffers rows and writes each buffer_rows of them as one pyarrow table
+
+    Subclasses open the file writer in _open(path, schema); schema is a
+    pyarrow schema.
+    """
+
+    def __init__(self, path, schema, buffer_rows=DEFAULT_BUFFER_ROWS * 10):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.schema = schema
+        self.buffer_rows = buffer_rows
+        self._writer = self._open(path, schema)
+        self._rows = []
+
+    def _open(self, path, schema):
+        raise NotImplementedError
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            table = self._pa.Table.from_pylist(self._rows, schema=self.schema)
+            self._writer.write_table(table)
+            self._rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetWriter(_ArrowWriter):
+    """Buffered Parquet writer; each buffer_rows rows become one row group"""
+
+    def _open(self, path, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(path, schema)
+
+
+class FeatherWriter(_ArrowWriter):
+    """
+    Buffered Arrow IPC file (Feather v2) writer; each buffer_rows rows become
+    one record batch
+
+    Batches are uncompressed so readers can memory-map them without copies.
+    """
+
+    def _open(self, path, schema):
+        return self._pa.ipc.new_file(path, schema)
@@ -0,0 +1,135 @@
+import os
+
+from converter.utils.cache import LookupCache, ip_block_key
+from converter.utils.device_utils import parse_user_agent_fields, user_agent_cache_stats
+from converter.utils.district_utils import BANGLADESH_DISTRICTS, DistrictMatcher
+from converter.utils.geoip_utils import get_asn_reader, reader_asn
+from converter.utils.json_codec import loads
+from metrics import METRICS_ENABLED, cache_gauges, timed
+
+# Remote /order endpoint; when unset, predict_from_api enriches in-process
+ENRICHMENT_API_URL = os.environ.get('ENRICHMENT_API_URL', '')
+ENRICHMENT_TIMEOUT = float(os.environ.get('ENRICHMENT_TIMEOUT', '2.0'))
+ENRICHMENT_POOL_SIZE = 16
+
+# Load ASN DB, shared with the converter
+reader = get_asn_reader()
+
+# ASN answers per /24 block, in memory and in SQLite across restarts
+asn_cache = LookupCache(
+    'geolite_asn',
+    ttl=float(os.environ.get('ASN_CACHE_TTL', '604800')),
+    path=os.environ.get('ASN_CACHE_PATH', 'asn_cache.sqlite') or None
+)
+
+# District matcher, indexed once at startup
+district_matcher = DistrictMatcher(BANGLADESH_DISTRICTS)
+
+if METRICS_ENABLED:
+    cache_gauges('fraud_cache', lambda: {'asn': asn_cache.stats(), 'user_agent': user_agent_cache_stats()})
+
+
+@timed('asn_lookup')
+def lookup_asn(ip):
+    if not reader:
+        return {'asn': None, 'org': 'Unavailable'}
+    # A miss is not cached: it would hide every address in the block for the whole TTL
+    return asn_cache.get_or_compute(ip_block_key(ip), lambda: _reader_asn(ip),
+                                    should_cache=lambda info: info['asn'] is not None)
+
+
+def _reader_asn(ip):
+    found = reader_asn(reader, ip)
+    if found is None:
+        return {'asn': None, 'org': 'Unknown'}
+    return {'asn': found[0], 'org': found[1]}
+
+
+@timed('classify_district')
+def classify_district_fuzzy(address, threshold=80):
+    return district_matcher.classify(address, threshold)
+
+
+@timed('parse_user_agent')
+def device_info(user_agent_string):
+    ua = parse_user_agent_fields(user_agent_string)
+    return {
+        'is_mobile': int(ua.is_mobile),
+        'is_pc': int(ua.is_pc),
+        'is_tablet': int(ua.is_tablet),
+        'browser': ua.browser,
+        'os': ua.os,
+        'device': ua.device
+    }
+
+
+def enrich_request(ip, user_agent_string, address):
+    """ASN, device and district info for one request, as returned by /order"""
+    return {
+        'ip': ip,
+        'user_agent': user_agent_string,
+        'asn': lookup_asn(ip),
+        'device_info': device_info(user_agent_string),
+        'district_detected': classify_district_fuzzy(address) if address else None
+    }
+
+
+@timed('classify_district_batch')
+def _classify_districts(addresses):
+    return district_matcher.classify_many(addresses, threshold=80, workers=1)
+
+
+def enrich_many(requests):
+    """enrich_request for a list of (ip, user_agent, address) tuples
+
+    Districts are classified in one classify_many pass, so fuzzy fallbacks
+    share a batched rapidfuzz call instead of one extractOne each.
+    """
+    districts = _classify_districts([address or '' for _, _, address in requests])
+    return [
+        {
+            'ip': ip,
+            'user_agent': user_agent_string,
+            'asn': lookup_asn(ip),
+            'device_info': device_info(user_agent_string),
+            'district_detected': district
+        }
+        for (ip, user_agent_string, _), district in zip(requests, districts)
+    ]
+
+
+class RemoteEnricher:
+    """Client for a remote /order endpoint over a keep-alive connection pool"""
+
+    def __init__(self, api_url, timeout=ENRICHMENT_TIMEOUT, pool_size=ENRICHMENT_POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def enrich(self, ip, user_agent_string, address):
+        # /order reads the client from these headers and the address from the query
+        headers = {'User-Agent': user_agent_string or ''}
+        if ip:
+            headers['X-Forwarded-For'] = ip
+        response = self.session.get(
+            self.api_url, params={'address': address or ''}, headers=headers, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return loads(response.content)
+
+
+_remote_enrichers = {}
+
+
+def get_remote_enricher(api_url):
+    """One pooled client per endpoint, reused across calls"""
+    enricher = _remote_enrichers.get(api_url)
+    if enricher is None:
+        enricher = _remote_enrichers[api_url] = RemoteEnricher(api_url)
+    return enricher
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+# Bump when the entry layout or FeatureEncoder's encoding logic changes
+FEATURE_CACHE_VERSION = 1
+
+# Where train() caches encoded matrices; FEATURE_CACHE_DIR="" disables the cache
+FEATURE_CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR', '.feature_cache')
+FEATURE_CACHE_MAX_BYTES = int(float(os.environ.get('FEATURE_CACHE_MAX_BYTES', str(2 * 2**30))))
+
+META_NAME = 'meta.json'
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class FeatureCache:
+    """
+    On-disk cache of encoded (X, y) matrices, keyed by input content and feature schema
+
+    The key hashes the data file's bytes together with the encoder's metadata
+    and feature names. Editing either the data or the schema therefore
+    misses instead of serving a stale matrix. Entries are directories of
+    .npy files (CSR matrices as their data/indices/indptr arrays), loaded
+    memory-mapped. When the total size exceeds max_bytes, the least recently
+    used entries are removed.
+    """
+
+    def __init__(self, path=FEATURE_CACHE_DIR, max_bytes=FEATURE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def key(self, data_path, encoder, sparse):
+        schema = json.dumps({
+            'cache_version': FEATURE_CACHE_VERSION,
+            'metadata': encoder.metadata,
+            'feature_names': encoder.feature_names,
+            'sparse': bool(sparse),
+        }, sort_keys=True)
+        return hashlib.sha256((file_digest(data_path) + schema).encode()).hexdigest()[:32]
+
+    def get(self, key):
+        """The cached (X, y) for key, memory-mapped, or None"""
+        entry = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(entry, META_NAME)) as f:
+                meta = json.load(f)
+            if meta.get('sparse'):
+                X = csr_matrix(tuple(
+                    np.load(os.path.join(entry, f'X.{part}.npy'), mmap_mode='r')
+                    for part in ('data', 'indices', 'indptr')
+                ), shape=tuple(meta['shape']))
+            else:
+                X = np.load(os.path.join(entry, 'X.npy'), mmap_mode='r')
+            y = np.load(os.path.join(entry, 'y.npy'), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            self.counters["misses"] += 1
+            return None
+        # The directory's mtime orders entries for eviction
+        os.utime(entry)
+        self.counters["hits"] += 1
+        return X, y
+
+    def put(self, key, X, y):
+        """Store (X, y) under key; written to a temporary directory and renamed into place"""
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, f'.{key}.{uuid.uuid4().hex}.tmp')
+        os.makedirs(tmp)
+        try:
+            if issparse(X):
+                X = X.tocsr()
+                for part in ('data', 'indices', 'indptr'):
+                    np.save(os.path.join(tmp, f'X.{part}.npy'), getattr(X, part), allow_pickle=False)
+            else:
+                np.save(os.path.join(tmp, 'X.npy'), np.ascontiguousarray(X), allow_pickle=False)
+            np.save(os.path.join(tmp, 'y.npy'), np.ascontiguousarray(y), allow_pickle=False)
+            meta = {
+                'cache_version': FEATURE_CACHE_VERSION,
+                'sparse': issparse(X),
+                'shape': list(X.shape),
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            }
+            with open(os.path.join(tmp, META_NAME), 'w') as f:
+                json.dump(meta, f)
+            os.rename(tmp, os.path.join(self.path, key))
+        except OSError:
+            # Another process stored the same key first; its entry is identical
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(os.path.join(self.path, key)):
+                raise
+        self.evict(keep=key)
+
+    def get_or_build(self, data_path, encoder, build, sparse=False):
+        """Return the cached (X, y) for data_path, calling build() and storing it on a miss"""
+        key = self.key(data_path, encoder, sparse)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        X, y = build()
+        self.put(key, X, y)
+        return X, y
+
+    def entries(self):
+        """(mtime, size, path) of every stored entry, oldest first"""
+        if not os.path.isdir(self.path):
+            return []
+        found = [
+            (entry.stat().st_mtime, _entry_size(entry.path), entry.path)
+            for entry in os.scandir(self.path)
+            if entry.is_dir() and not entry.name.startswith('.')
+        ]
+        return sorted(found)
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(path) == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.counters["evictions"] += 1
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            **self.counters,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+_feature_cache = None
+
+
+def get_feature_cache():
+    """Process-wide FeatureCache at FEATURE_CACHE_DIR, or None when disabled"""
+    global _feature_cache
+    if not FEATURE_CACHE_DIR:
+        return None
+    if _feature_cache is None:
+        _feature_cache = FeatureCache()
+    return _feature_cache
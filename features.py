@@ -0,0 +1,333 @@
+import zlib
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from converter.utils.device_utils import parse_user_agent_fields
+from metrics import timed
+
+LABEL_COLUMNS = ['was_cancelled', 'is_fraud']
+PRODUCT_CATEGORIES = ['clothing', 'cosmetics', 'electronics', 'groceries']
+
+# Columns produced by FeatureEncoder.columns_from_orders, in _order_codes order
+ONE_HOT_GROUPS = ['product', 'phone', 'browser', 'os', 'device', 'district']
+FLAG_COLUMNS = ['is_sunday', 'is_h00', 'asn_known', 'asn_bd', 'is_coupon_used']
+CODE_COLUMNS = ['order_value', 'cart_item_count'] + ONE_HOT_GROUPS + FLAG_COLUMNS + LABEL_COLUMNS
+# High-cardinality fields hashed into hash_width shared columns when metadata['hash_width'] > 0
+HASHED_FIELDS = ['sim_operator', 'email_provider', 'asn_number', 'device_family', 'phone_number_prefix']
+HASH_COLUMNS = [f'hash_{field}' for field in HASHED_FIELDS]
+# Converter user_device_type values -> FeatureEncoder device names
+STORE_DEVICE_TYPES = {'mobile': 'phone', 'pc': 'desktop', 'tablet': 'tablet'}
+
+CODE_DTYPES = {
+    'order_value': np.float64,
+    'cart_item_count': np.float64,
+    **{name: np.int32 for name in ONE_HOT_GROUPS},
+    **{name: bool for name in FLAG_COLUMNS + LABEL_COLUMNS},
+    **{name: np.int32 for name in HASH_COLUMNS},
+}
+
+
+# Order fields the encoder and enrichment read, by the type they must have when present
+NUMERIC_FIELDS = ['order_value', 'cart_item_count', 'order_hour']
+TEXT_FIELDS = [
+    'product_category', 'order_day', 'browser', 'os', 'device_type', 'district',
+    'ip', 'user_agent', 'address', 'customer_phone', 'customer_email',
+] + [field for field in HASHED_FIELDS if field != 'asn_number']
+
+
+def validate_order(order):
+    """Raise ValueError for an order whose fields the encoder or enrichment cannot use
+
+    Numeric fields must be numbers when present and text fields strings or
+    null; asn must be an object. Missing fields are fine and take defaults.
+    """
+    if not isinstance(order, dict):
+        raise ValueError("order is not a JSON object")
+    for name in NUMERIC_FIELDS:
+        if name in order and not isinstance(order[name], (int, float)):
+            raise ValueError(f"{name} must be a number")
+    for name in TEXT_FIELDS:
+        if order.get(name) is not None and not isinstance(order[name], str):
+            raise ValueError(f"{name} must be a string")
+    if order.get('asn') is not None and not isinstance(order['asn'], dict):
+        raise ValueError("asn must be an object")
+    return order
+
+
+def feature_hash(field, value, width):
+    """Hashed column of field=value in [0, width), or -1 for a missing value
+
+    crc32 is stable across processes and platforms, unlike hash() on str, so
+    a saved model and the servers loading it agree on every column.
+    """
+    if not value:
+        return -1
+    return zlib.crc32(f'{field}={str(value).lower()}'.encode()) % width
+
+
+class FeatureEncoder:
+    """Columnar one-hot encoder for the features built by FraudDetectionModel
+
+    With metadata['hash_width'] = W > 0, the HASHED_FIELDS are also encoded
+    by feature hashing into W shared columns. Unseen values need no new
+    columns, so the feature count, model size and per-order scoring cost
+    stay fixed however many values appear. Distinct values can collide in
+    one column; a wider W makes that rarer.
+    """
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.hash_width = int(metadata.get('hash_width', 0))
+        self.code_columns = CODE_COLUMNS + (HASH_COLUMNS if self.hash_width else [])
+
+        # (column prefix, category values) in the order preprocess_data emits them
+        self.phone_prefixes = list(metadata['phone_prefixes'])
+        self.products = list(PRODUCT_CATEGORIES)
+        self.browsers = [b.lower() for b in metadata['browsers']]
+        self.os_list = [o.lower() for o in metadata['os_list']]
+        self.devices = [d.lower() for d in metadata['devices']]
+        self.districts = [d.lower() for d in metadata['districts']]
+
+        # Category value -> code lookups, built once per encoder
+        self._product_codes = {v: i for i, v in enumerate(self.products)}
+        self._phone_codes = {v: i for i, v in enumerate(self.phone_prefixes)}
+        self._browser_codes = {v: i for i, v in enumerate(self.browsers)}
+        self._os_codes = {v: i for i, v in enumerate(self.os_list)}
+        self._device_codes = {v: i for i, v in enumerate(self.devices)}
+        self._district_codes = {v: i for i, v in enumerate(self.districts)}
+
+        self.feature_names = (
+            ['order_value', 'cart_item_count']
+            + [f'is_product_{cat}' for cat in self.products]
+            + ['is_sunday', 'is_h00']
+            + [f'is_{prefix}' for prefix in self.phone_prefixes]
+            + ['asn_known', 'asn_bd']
+            + [f'is_browser_{br}' for br in self.browsers]
+            + [f'is_os_{os}' for os in self.os_list]
+            + [f'is_device_{dev}' for dev in self.devices]
+            + [f'is_district_{dist}' for dist in self.districts]
+            + ['is_coupon_used']
+            + [f'hash_{i}' for i in range(self.hash_width)]
+        )
+        self.n_features = len(self.feature_names)
+
+        # Column offset of each one-hot group
+        index = {name: i for i, name in enumerate(self.feature_names)}
+        self._offsets = {
+            'product': index[f'is_product_{self.products[0]}'],
+            'phone': index[f'is_{self.phone_prefixes[0]}'] if self.phone_prefixes else 0,
+            'browser': index[f'is_browser_{self.browsers[0]}'] if self.browsers else 0,
+            'os': index[f'is_os_{self.os_list[0]}'] if self.os_list else 0,
+            'device': index[f'is_device_{self.devices[0]}'] if self.devices else 0,
+            'district': index[f'is_district_{self.districts[0]}'] if self.districts else 0,
+        }
+        self._flag_columns = {name: index[name] for name in FLAG_COLUMNS}
+        self._hash_offset = index['hash_0'] if self.hash_width else 0
+
+    def _order_codes(self, order):
+        """Extract one order's continuous values, category codes and flags"""
+        asn = (order.get('asn') or {}).get('asn', '')
+        codes = (
+            min(order.get('order_value', 0), self.metadata['max_order_value']),
+            min(order.get('cart_item_count', 0), self.metadata['max_cart_items']),
+            self._product_codes.get((order.get('product_category') or '').lower(), -1),
+            self._phone_codes.get(str(order.get('customer_phone_prefix', '')), -1),
+            self._browser_codes.get((order.get('browser') or '').lower(), -1),
+            self._os_codes.get((order.get('os') or '').lower(), -1),
+            self._device_codes.get((order.get('device_type') or '').lower(), -1),
+            self._district_codes.get((order.get('district') or '').lower(), -1),
+            (order.get('order_day') or '').lower() == 'sunday',
+            order.get('order_hour', 0) == 0,
+            isinstance(asn, str) and asn.startswith('AS'),
+            bool(order.get('is_bangladesh', False)),
+            bool(order.get('coupon_used', False)),
+            bool(order.get('was_cancelled', False)),
+            bool(order.get('is_fraud', False)),
+        )
+        if not self.hash_width:
+            return codes
+        values = (order.get('sim_operator'), order.get('email_provider'), asn,
+                  order.get('device_family'), order.get('phone_number_prefix'))
+        return codes + tuple(
+            feature_hash(field, value, self.hash_width) for field, value in zip(HASHED_FIELDS, values)
+        )
+
+    def columns_from_orders(self, orders):
+        """Turn a list of order dicts into categorical code columns in one pass"""
+        rows = [self._order_codes(order) for order in orders]
+        if rows:
+            values = list(zip(*rows))
+        else:
+            values = [()] * len(self.code_columns)
+        return {
+            name: np.asarray(column, dtype=CODE_DTYPES[name])
+            for name, column in zip(self.code_columns, values)
+        }
+
+    def columns_from_store(self, table):
+        """Turn a converter feature store table (pyarrow) into categorical code columns
+
+        Each string column is dictionary-encoded once per record batch, so
+        category lookups run over the distinct values only.
+        """
+        parts = {name: [] for name in self.code_columns}
+        for batch in table.to_batches():
+            for name, values in self._store_batch_codes(batch).items():
+                parts[name].append(values)
+        return {
+            name: np.concatenate(values).astype(CODE_DTYPES[name], copy=False)
+            if values else np.zeros(0, dtype=CODE_DTYPES[name])
+            for name, values in parts.items()
+        }
+
+    def _store_batch_codes(self, batch):
+        def column(name):
+            return batch.column(batch.schema.get_field_index(name))
+
+        def numbers(name, limit):
+            return np.minimum(column(name).fill_null(0).to_numpy(), limit)
+
+        def lookup(name, mapping):
+            # mapping(value) -> code for each distinct non-null value; nulls get mapping(None)
+            encoded = column(name).dictionary_encode()
+            dictionary = encoded.dictionary.to_pylist()
+            table = np.array([mapping(v) for v in dictionary] + [mapping(None)])
+            return table[encoded.indices.fill_null(len(dictionary)).to_numpy()]
+
+        def codes(lookup_table, key=str.lower):
+            return lambda v: -1 if v is None else lookup_table.get(key(v), -1)
+
+        def flag(name):
+            return column(name).fill_null(False).to_numpy(zero_copy_only=False)
+
+        def hashed(field, value=lambda v: v):
+            return lambda v: feature_hash(field, v and value(v), self.hash_width)
+
+        devices = {k: self._device_codes.get(v, -1) for k, v in STORE_DEVICE_TYPES.items()}
+        codes = {
+            'order_value': numbers('order_total', self.metadata['max_order_value']),
+            'cart_item_count': numbers('cart_item_count', self.metadata['max_cart_items']),
+            'product': lookup('product_type', codes(self._product_codes)),
+            'phone': lookup('phone_number_prefix', codes(self._phone_codes, key=lambda v: v[:3])),
+            'browser': lookup('user_browser', codes(self._browser_codes)),
+            'os': lookup('user_os_name', codes(self._os_codes)),
+            'device': lookup('user_device_type', codes(devices)),
+            'district': lookup('district_detected', codes(self._district_codes)),
+            'is_sunday': lookup('day_of_week', lambda v: v is not None and v.lower() == 'sunday'),
+            'is_h00': column('hour_of_day').fill_null(-1).to_numpy() == 0,
+            'asn_known': lookup('asn_number', lambda v: v is not None and v.startswith('AS')),
+            'asn_bd': lookup('asn_name', lambda v: v is not None and ('Bangladesh' in v or 'BD' in v)),
+            'is_coupon_used': flag('is_coupon_used'),
+            'was_cancelled': flag('was_cancelled'),
+            'is_fraud': flag('is_fraud'),
+        }
+        if self.hash_width:
+            codes.update({
+                'hash_sim_operator': lookup('sim_operator', hashed('sim_operator')),
+                'hash_email_provider': lookup('email_provider', hashed('email_provider')),
+                'hash_asn_number': lookup('asn_number', hashed('asn_number')),
+                # The store keeps the raw user agent; it is parsed once per distinct value
+                'hash_device_family': lookup('user_agent', hashed(
+                    'device_family', lambda v: parse_user_agent_fields(v).device)),
+                'hash_phone_number_prefix': lookup('phone_number_prefix', hashed('phone_number_prefix')),
+            })
+        return codes
+
+    @timed('encode')
+    def active_features(self, order):
+        """Return (indices, values) of the non-zero features of a single order"""
+        codes = self._order_codes(order)
+        indices = [0, 1]
+        values = [float(codes[0]), float(codes[1])]
+        for group, code in zip(ONE_HOT_GROUPS, codes[2:8]):
+            if code >= 0:
+                indices.append(self._offsets[group] + code)
+                values.append(1.0)
+        for name, flag in zip(FLAG_COLUMNS, codes[8:13]):
+            if flag:
+                indices.append(self._flag_columns[name])
+                values.append(1.0)
+        for code in codes[len(CODE_COLUMNS):]:
+            if code >= 0:
+                indices.append(self._hash_offset + code)
+                values.append(1.0)
+        return indices, values
+
+    def encode_columns(self, columns):
+        """Build the dense feature matrix from categorical code columns"""
+        n = len(columns['order_value'])
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        rows = np.arange(n)
+
+        X[:, 0] = columns['order_value']
+        X[:, 1] = columns['cart_item_count']
+
+        for group, offset in self._offsets.items():
+            codes = columns[group]
+            known = codes >= 0
+            X[rows[known], offset + codes[known]] = 1.0
+
+        for name, col in self._flag_columns.items():
+            X[:, col] = columns[name]
+
+        # Two fields of one order may hash to the same column; their ones add up
+        for name in self.code_columns[len(CODE_COLUMNS):]:
+            codes = columns[name]
+            known = codes >= 0
+            np.add.at(X, (rows[known], self._hash_offset + codes[known]), 1.0)
+
+        return X
+
+    def encode_columns_sparse(self, columns):
+        """Build the feature matrix as CSR straight from the code columns"""
+        n = len(columns['order_value'])
+        rows = np.arange(n, dtype=np.int32)
+        row_parts, col_parts, data_parts = [], [], []
+
+        for col, name in enumerate(['order_value', 'cart_item_count']):
+            values = columns[name]
+            nonzero = values != 0
+            row_parts.append(rows[nonzero])
+            col_parts.append(np.full(nonzero.sum(), col, dtype=np.int32))
+            data_parts.append(values[nonzero])
+
+        for group, offset in self._offsets.items():
+            codes = columns[group]
+            known = codes >= 0
+            row_parts.append(rows[known])
+            col_parts.append((offset + codes[known]).astype(np.int32))
+            data_parts.append(np.ones(known.sum()))
+
+        for name, col in self._flag_columns.items():
+            flags = columns[name]
+            row_parts.append(rows[flags])
+            col_parts.append(np.full(flags.sum(), col, dtype=np.int32))
+            data_parts.append(np.ones(flags.sum()))
+
+        for name in self.code_columns[len(CODE_COLUMNS):]:
+            codes = columns[name]
+            known = codes >= 0
+            row_parts.append(rows[known])
+            col_parts.append((self._hash_offset + codes[known]).astype(np.int32))
+            data_parts.append(np.ones(known.sum()))
+
+        # Duplicate (row, column) entries from hash collisions are summed
+        return csr_matrix(
+            (np.concatenate(data_parts), (np.concatenate(row_parts), np.concatenate(col_parts))),
+            shape=(n, self.n_features),
+        )
+
+    @timed('encode')
+    def encode(self, orders, sparse=False):
+        """Encode orders into (feature matrix, label matrix)"""
+        return self.encode_code_columns(self.columns_from_orders(orders), sparse=sparse)
+
+    def encode_code_columns(self, columns, sparse=False):
+        """Encode categorical code columns into (feature matrix, label matrix)"""
+        if sparse:
+            X = self.encode_columns_sparse(columns)
+        else:
+            X = self.encode_columns(columns)
+        y = np.column_stack([columns[name] for name in LABEL_COLUMNS]).astype(np.int64)
+        return X, y
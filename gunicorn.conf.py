@@ -0,0 +1,20 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:app
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'sync'
+keepalive = 5
+timeout = 30
+
+# Import app.py (model artifact, GeoLite reader, district matcher) once in the
+# master; forked workers share those pages copy-on-write
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers do not write to (and so copy) the shared pages
+    gc.freeze()
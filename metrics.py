@@ -0,0 +1,200 @@
+"""In-process metrics in Prometheus text format
+
+Stages are timed with the @timed decorator, which is applied at import
+time: with METRICS_ENABLED=0 it returns the function itself, so a disabled
+build runs exactly the uninstrumented code. Metrics are per process; under
+gunicorn each worker reports its own.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no', 'off')
+
+# Seconds; per-order stages run in microseconds, bulk requests in seconds
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value, *labels):
+        self.labels(*labels).observe(value)
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            with child.lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {total!r}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Gauge:
+    """Values read at scrape time from callback() -> {label values tuple: number}"""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in sorted(self.callback().items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames, callback):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'fraud_stage_duration_seconds', 'Time spent in each enrichment and scoring stage', ('stage',)
+)
+REQUEST_SECONDS = registry.histogram(
+    'fraud_request_duration_seconds', 'HTTP request latency by endpoint', ('endpoint',)
+)
+REQUESTS = registry.counter(
+    'fraud_requests_total', 'HTTP requests by endpoint and status code', ('endpoint', 'status')
+)
+
+
+def timed(stage):
+    """Decorator recording each call's duration under STAGE_SECONDS{stage=...}
+
+    Returns the function unchanged when metrics are disabled.
+    """
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        observe = STAGE_SECONDS.labels(stage).observe
+        perf_counter = time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def observe_request(endpoint, status, seconds):
+    REQUEST_SECONDS.observe(seconds, endpoint)
+    REQUESTS.inc(endpoint, str(status))
+
+
+def cache_gauges(name, stats):
+    """Register gauges over stats() -> {cache name: LookupCache-style stats dict}"""
+    def values(key):
+        return lambda: {(cache,): s[key] for cache, s in stats().items()}
+
+    registry.gauge(f'{name}_hits', 'Cache hits since start', ('cache',), values('hits'))
+    registry.gauge(f'{name}_misses', 'Cache misses since start', ('cache',), values('misses'))
+    registry.gauge(f'{name}_hit_rate', 'Cache hit rate since start', ('cache',), values('hit_rate'))
+    registry.gauge(f'{name}_size', 'Entries held in memory', ('cache',), values('size'))
@@ -1,12 +1,44 @@
-import json
+import os
+import sys
+import time
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LogisticRegression
+from scipy.sparse import issparse
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+from artifacts import load_artifact, save_artifact
+from converter.utils import json_codec
+from converter.utils.email_utils import get_email_provider
+from converter.utils.feature_store import open_store
+from converter.utils.phone_utils import get_operator_from_prefix, get_phone_prefix
+from feature_cache import get_feature_cache
+from features import LABEL_COLUMNS, FeatureEncoder
+from metrics import timed
+from model_selection import DEFAULT_CS, DEFAULT_FOLDS, DEFAULT_SOLVERS, cv_search, fit_best, print_report
+from scoring import CompiledScorer
+from streaming import iter_chunks
+
+# Orders per chunk for train_streaming
+DEFAULT_CHUNK_SIZE = 10000
+
+# train_streaming's SGD: a small constant step, with weights averaged after
+# the first SGD_AVERAGE_AFTER orders. The default 'optimal' schedule takes huge
+# early steps on these one-hot features and leaves probabilities saturated at
+# 0 or 1. Averaging from the first order instead drags the intercept toward
+# its start at 0, badly so with small chunks.
+SGD_AVERAGE_AFTER = 10000
+SGD_PARAMS = {'loss': 'log_loss', 'average': SGD_AVERAGE_AFTER, 'learning_rate': 'constant', 'eta0': 0.01}
+
+# Where predict looks for a saved model when none has been trained or loaded
+DEFAULT_ARTIFACT_PATH = os.environ.get('MODEL_ARTIFACT_PATH', 'model_artifact')
+
+# Hashed columns for the high-cardinality fields of new models; 0 leaves them out
+FEATURE_HASH_WIDTH = int(os.environ.get('FEATURE_HASH_WIDTH', '0'))
+
 
 class FraudDetectionModel:
     def __init__(self):
@@ -15,6 +47,7 @@ class FraudDetectionModel:
         self.fraud_model = LogisticRegression()
         self.feature_columns = []
         self.is_fitted = False
+        self.version = None
         self.metadata = {
             "max_order_value": 20000,
             "max_cart_items": 20,
@@ -22,103 +55,188 @@ class FraudDetectionModel:
             "browsers": ["Chrome", "Opera", "Firefox", "Safari", "Edge"],
             "os_list": ["Windows", "Android", "iOS", "Mac OS X"],
             "devices": ["phone", "desktop", "tablet"],
-            "districts": [d["en"] for d in BANGLADESH_DISTRICTS]  # From your app
+            "districts": [d["en"] for d in BANGLADESH_DISTRICTS],  # From your app
+            "hash_width": FEATURE_HASH_WIDTH
         }
+        self.encoder = FeatureEncoder(self.metadata)
+
+    def set_metadata(self, metadata):
+        self.metadata = metadata
+        self.encoder = FeatureEncoder(metadata)
+
+    def save(self, path=DEFAULT_ARTIFACT_PATH):
+        """Save the fitted scaler, models and feature schema to an artifact directory"""
+        return save_artifact(self, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_ARTIFACT_PATH, mmap_mode='r', verify=True):
+        """Load a model saved with save() without retraining"""
+        return load_artifact(cls(), path, mmap_mode=mmap_mode, verify=verify)
         
     def preprocess_data(self, data):
         """Convert raw JSON data into standardized features"""
-        processed = []
-        
-        for order in data['orders']:
-            features = {}
-            
-            # Standardize continuous variables (0-1)
-            features['order_value'] = min(order.get('order_value', 0), self.metadata['max_order_value'])
-            features['order_value'] = min(order.get('order_value', 0), self.metadata['max_order_value'])
-            features['cart_item_count'] = min(order.get('cart_item_count', 0), self.metadata['max_cart_items'])
-
-        
-            features['cart_item_count'] = min(order.get('cart_item_count', 0), self.metadata['max_cart_items'])
-            features['cart_item_count'] = features['cart_item_count'][0] / features['cart_item_count'][1]
-            
-            # Product categories
-            product_cat = order.get('product_category', '').lower()
-            for cat in ['clothing', 'cosmetics', 'electronics', 'groceries']:
-                features[f'is_product_{cat}'] = 1 if product_cat == cat else 0
-                
-            # Time features
-            features['is_sunday'] = 1 if order.get('order_day', '').lower() == 'sunday' else 0
-            order_hour = order.get('order_hour', 0)
-            features['is_h00'] = 1 if order_hour == 0 else 0
-            
-            # Customer info
-            phone_prefix = str(order.get('customer_phone_prefix', ''))
-            for prefix in self.metadata['phone_prefixes']:
-                features[f'is_{prefix}'] = 1 if phone_prefix == prefix else 0
-                
-            # ASN features
-            asn = order.get('asn', {}).get('asn', '')
-            features['asn_known'] = 1 if asn and asn.startswith('AS') else 0
-            features['asn_bd'] = 1 if order.get('is_bangladesh', False) else 0
-            
-            # Browser, OS, Device
-            browser = (order.get('browser') or '').lower()
-            for br in self.metadata['browsers']:
-                features[f'is_browser_{br.lower()}'] = 1 if browser == br.lower() else 0
-                
-            os = (order.get('os') or '').lower()
-            for operating_system in self.metadata['os_list']:
-                features[f'is_os_{operating_system.lower()}'] = 1 if os == operating_system.lower() else 0
-                
-            device_type = (order.get('device_type') or '').lower()
-            for dev in self.metadata['devices']:
-                features[f'is_device_{dev.lower()}'] = 1 if device_type == dev.lower() else 0
-                
-            # Location
-            district = (order.get('district') or '').lower()
-            for dist in self.metadata['districts']:
-                features[f'is_district_{dist.lower()}'] = 1 if district == dist.lower() else 0
-                
-            # Misc
-            features['is_coupon_used'] = 1 if order.get('coupon_used', False) else 0
-            
-            # Labels
-            features['was_cancelled'] = 1 if order.get('was_cancelled', False) else 0
-            features['is_fraud'] = 1 if order.get('is_fraud', False) else 0
-            
-            processed.append(features)
-            
-        return pd.DataFrame(processed)
+        X, y = self.encoder.encode(data['orders'])
+        df = pd.DataFrame(X, columns=self.encoder.feature_names)
+        for i, label in enumerate(LABEL_COLUMNS):
+            df[label] = y[:, i]
+        return df
     
-    def train(self, data_path='test_data.json'):
+    def train(self, data_path='test_data.json', sparse=None):
         """Train models using data from JSON file"""
-        with open(data_path) as f:
-            data = json.load(f)
-            
-        df = self.preprocess_data(data)
-        self.feature_columns = [col for col in df.columns if col not in ['was_cancelled', 'is_fraud']]
-        
-        X = df[self.feature_columns]
-        y_cancel = df['was_cancelled']
-        y_fraud = df['is_fraud']
-        
-        X_scaled = self.scaler.fit_transform(X)
+        self.fit_matrix(*self.encode_file(data_path, sparse=sparse))
+
+    def _use_sparse(self, sparse):
+        # Hashed columns are almost all zeros, so they default to CSR
+        return self.encoder.hash_width > 0 if sparse is None else sparse
+
+    def encode_file(self, data_path, sparse=None):
+        """Feature and label matrices for a JSON data file, through the feature cache
+
+        The matrices are cached by the file's content and the feature schema,
+        so repeated runs on unchanged data skip JSON parsing and encoding.
+        """
+        sparse = self._use_sparse(sparse)
+
+        def build():
+            with open(data_path, 'rb') as f:
+                data = json_codec.load(f)
+            return self.encoder.encode(data['orders'], sparse=sparse)
+
+        cache = get_feature_cache()
+        if cache is None:
+            return build()
+        return cache.get_or_build(data_path, self.encoder, build, sparse=sparse)
+
+    def train_from_store(self, store_path, sparse=None):
+        """Train models from a converter feature store (python converter/main.py -f feather)
+
+        The store is memory-mapped and encoded column-wise, with no JSON
+        parsing or re-enrichment.
+        """
+        columns = self.encoder.columns_from_store(open_store(store_path))
+        X, y = self.encoder.encode_code_columns(columns, sparse=self._use_sparse(sparse))
+        self.fit_matrix(X, y)
+
+    def fit(self, orders, sparse=None):
+        """Train models on a list of order dicts
+
+        With sparse=True the features are built as a CSR matrix and scaled
+        without centering, so the one-hot columns are never densified. The
+        default is sparse when hashed columns are on and dense otherwise.
+        """
+        X, y = self.encoder.encode(orders, sparse=self._use_sparse(sparse))
+        self.fit_matrix(X, y)
+
+    def fit_matrix(self, X, y):
+        """Train models on an encoded feature matrix and its (N, 2) label matrix"""
+        self.feature_columns = list(self.encoder.feature_names)
+        y_cancel = y[:, 0]
+        y_fraud = y[:, 1]
         
-        if len(df) > 50:
-            X_train, X_test, y_cancel_train, y_cancel_test, y_fraud_train, y_fraud_test = train_test_split(
-                X_scaled, y_cancel, y_fraud, test_size=0.2, random_state=42)
-        else:
-            X_train, y_cancel_train, y_fraud_train = X_scaled, y_cancel, y_fraud
-            X_test, y_cancel_test, y_fraud_test = None, None, None
+        X_train, X_test, y_cancel_train, y_cancel_test, y_fraud_train, y_fraud_test = \
+            self._scale_and_split(X, y_cancel, y_fraud)
         
         self.cancellation_model.fit(X_train, y_cancel_train)
         self.fraud_model.fit(X_train, y_fraud_train)
         self.is_fitted = True
+        self.version = None
         
         if X_test is not None:
             print("Model Evaluation Results:")
             self.evaluate(X_test, y_cancel_test, y_fraud_test)
     
+    def _scale_and_split(self, X, y_cancel, y_fraud):
+        # Centering would densify a sparse matrix; the fitted intercepts absorb the offset
+        self.scaler.set_params(with_mean=not issparse(X))
+        X_scaled = self.scaler.fit_transform(X)
+        
+        if X.shape[0] > 50:
+            return train_test_split(X_scaled, y_cancel, y_fraud, test_size=0.2, random_state=42)
+        return X_scaled, None, y_cancel, None, y_fraud, None
+
+    def train_search(self, data_path='test_data.json', sparse=None, **search_kwargs):
+        """Like train, but picks each model's solver and C by cross-validation (see fit_matrix_search)"""
+        X, y = self.encode_file(data_path, sparse=sparse)
+        return self.fit_matrix_search(X, y, **search_kwargs)
+
+    def fit_matrix_search(self, X, y, solvers=DEFAULT_SOLVERS, Cs=DEFAULT_CS, folds=DEFAULT_FOLDS,
+                          n_jobs=-1):
+        """Train models after a cross-validated search over solver and regularization
+
+        X is scaled once and split 80/20 as in fit_matrix. The search runs
+        on the training part with every (target, solver, fold) in parallel
+        over n_jobs cores, warm-starting along the C path. Then both targets'
+        best configurations are refitted in parallel and evaluated on the
+        held-out part. Returns the search report, with the fit time per configuration.
+        """
+        self.feature_columns = list(self.encoder.feature_names)
+        y_cancel, y_fraud = y[:, 0], y[:, 1]
+        X_train, X_test, y_cancel_train, y_cancel_test, y_fraud_train, y_fraud_test = \
+            self._scale_and_split(X, y_cancel, y_fraud)
+        y_train = np.column_stack([y_cancel_train, y_fraud_train])
+
+        start = time.perf_counter()
+        report = cv_search(X_train, y_train, solvers=solvers, Cs=Cs, folds=folds, n_jobs=n_jobs)
+        self.cancellation_model, self.fraud_model = fit_best(X_train, y_train, report)
+        elapsed = time.perf_counter() - start
+        self.is_fitted = True
+        self.version = None
+
+        print_report(report, elapsed)
+        if X_test is not None:
+            print("\nModel Evaluation Results:")
+            self.evaluate(X_test, y_cancel_test, y_fraud_test)
+        report['seconds'] = elapsed
+        return report
+
+    def train_streaming(self, paths, chunk_size=DEFAULT_CHUNK_SIZE, epochs=1, random_state=42):
+        """Train out of core from NDJSON or JSON page files, chunk_size orders at a time
+
+        The first pass accumulates the scaler statistics with partial_fit; each
+        following epoch feeds the scaled chunks to two averaged SGD logistic
+        regressions (SGD_PARAMS).
+        Only one chunk is held in memory. Returns throughput stats.
+        """
+        self.feature_columns = list(self.encoder.feature_names)
+        sparse = self._use_sparse(None)
+        self.scaler = StandardScaler(with_mean=not sparse)
+        self.cancellation_model = SGDClassifier(random_state=random_state, **SGD_PARAMS)
+        self.fraud_model = SGDClassifier(random_state=random_state, **SGD_PARAMS)
+        classes = np.array([0, 1])
+
+        start = time.perf_counter()
+        n_orders = 0
+        for chunk in iter_chunks(paths, chunk_size):
+            X, _ = self.encoder.encode(chunk, sparse=sparse)
+            self.scaler.partial_fit(X)
+            n_orders += len(chunk)
+        if not n_orders:
+            raise ValueError(f"no orders found in {paths}")
+
+        for _ in range(epochs):
+            for chunk in iter_chunks(paths, chunk_size):
+                X, y = self.encoder.encode(chunk, sparse=sparse)
+                X_scaled = self.scaler.transform(X)
+                self.cancellation_model.partial_fit(X_scaled, y[:, 0], classes=classes)
+                self.fraud_model.partial_fit(X_scaled, y[:, 1], classes=classes)
+        elapsed = time.perf_counter() - start
+
+        self.is_fitted = True
+        self.version = None
+
+        # Every order is read once for the scaler and once per epoch
+        orders_read = n_orders * (epochs + 1)
+        stats = {
+            'orders': n_orders,
+            'chunk_size': chunk_size,
+            'epochs': epochs,
+            'seconds': elapsed,
+            'orders_per_second': orders_read / elapsed if elapsed else float('inf'),
+        }
+        print(f"Streamed {n_orders} orders x {epochs + 1} passes in {elapsed:.2f}s "
+              f"({stats['orders_per_second']:.0f} orders/s)")
+        return stats
+
     def evaluate(self, X_test, y_cancel_test, y_fraud_test):
         cancel_pred = self.cancellation_model.predict(X_test)
         print("\nCancellation Model:")
@@ -128,30 +246,60 @@ class FraudDetectionModel:
         print("\nFraud Detection Model:")
         print(classification_report(y_fraud_test, fraud_pred))
     
-    def predict_from_api(self, order_data, api_url='http://localhost:5000/order'):
-        """Enrich order data with ASN/device info from your API"""
-        import requests
+    def predict_from_api(self, order_data, api_url=None):
+        """Enrich order data with ASN/device/district info, then predict
 
-        # Call your existing API to get ASN/device info
+        Enrichment runs in-process with the same code as app.py's /order.
+        If api_url (or ENRICHMENT_API_URL) is set, that endpoint is called
+        instead, over a pooled keep-alive session with a timeout.
+        """
+        import enrichment
+
+        api_url = api_url if api_url is not None else enrichment.ENRICHMENT_API_URL
+        ip = order_data.get('ip')
+        user_agent = order_data.get('user_agent', '')
+        address = order_data.get('address', '')
         try:
-            response = requests.post(api_url, json=order_data)
-            api_data = response.json()
-            
-            # Merge the data
-            enriched_data = {
-                **order_data,
-                'asn': api_data.get('asn', {}),
-                'browser': api_data.get('device_info', {}).get('browser', ''),
-                'os': api_data.get('device_info', {}).get('os', ''),
-                'device_type': self._determine_device_type(api_data.get('device_info', {})),
-                'district': api_data.get('district_detected', ''),
-                'is_bangladesh': self._is_bangladesh_asn(api_data.get('asn', {}).get('org', ''))
-            }
-            return self.predict(enriched_data)
+            if api_url:
+                api_data = enrichment.get_remote_enricher(api_url).enrich(ip, user_agent, address)
+            else:
+                api_data = enrichment.enrich_request(ip, user_agent, address)
         except Exception as e:
             print(f"API Error: {e}")
             return self.predict(order_data)  # Fallback to basic prediction
-    
+
+        return self.predict(self.merge_enrichment(order_data, api_data))
+
+    def merge_enrichment(self, order_data, api_data):
+        """Fill an order's model fields from /order-style enrichment data
+
+        The phone and email fields that the converter derives for the feature
+        store are derived here the same way, from customer_phone and
+        customer_email, so hashed models see the same values at serving time.
+        """
+        asn = api_data.get('asn') or {}
+        device_info = api_data.get('device_info') or {}
+        # GeoLite2 returns the bare AS number; the encoder expects "AS<n>"
+        asn_number = asn.get('asn')
+        phone_prefix = (order_data.get('phone_number_prefix')
+                        or get_phone_prefix(order_data.get('customer_phone') or ''))
+        return {
+            **order_data,
+            'asn': {**asn, 'asn': f"AS{asn_number}" if asn_number else ''},
+            'browser': device_info.get('browser', ''),
+            'os': device_info.get('os', ''),
+            'device_type': self._determine_device_type(device_info),
+            'device_family': device_info.get('device', ''),
+            'phone_number_prefix': phone_prefix,
+            # The 3-digit customer_phone_prefix is enough to name the operator
+            'sim_operator': order_data.get('sim_operator') or get_operator_from_prefix(
+                phone_prefix or str(order_data.get('customer_phone_prefix') or '')),
+            'email_provider': order_data.get('email_provider') or get_email_provider(
+                order_data.get('customer_email') or ''),
+            'district': api_data.get('district_detected') or '',
+            'is_bangladesh': self._is_bangladesh_asn(asn.get('org') or '')
+        }
+
     def _determine_device_type(self, device_info):
         if device_info.get('is_mobile'):
             return 'phone'
@@ -164,24 +312,51 @@ class FraudDetectionModel:
     def _is_bangladesh_asn(self, asn_org):
         return 'Bangladesh' in asn_org or 'BD' in asn_org
     
+    def compile_scorer(self):
+        """Build a CompiledScorer that scores orders without pandas or sklearn"""
+        return CompiledScorer(self)
+
     def predict(self, order_data):
+        return self.predict_batch([order_data])[0]
+
+    def predict_batch(self, orders):
+        """Score a list of orders in one pass, returning results in input order"""
+        if not orders:
+            return []
         if not self.is_fitted:
-            self.train()
-            
-        input_data = {"orders": [order_data], "metadata": self.metadata}
-        df = self.preprocess_data(input_data)
-        X = df[self.feature_columns]
+            if not os.path.isdir(DEFAULT_ARTIFACT_PATH):
+                raise RuntimeError(
+                    f"Model is not fitted and no artifact exists at {DEFAULT_ARTIFACT_PATH}; "
+                    "run train() and save() first"
+                )
+            load_artifact(self, DEFAULT_ARTIFACT_PATH)
+
+        cancel_probs, fraud_probs = self._predict_proba(self._feature_matrix(orders))
+
+        return [
+            {
+                'cancellation_probability': float(cancel_prob),
+                'fraud_probability': float(fraud_prob),
+                'likely_cancelled': bool(cancel_prob > 0.5),
+                'likely_fraud': bool(fraud_prob > 0.5)
+            }
+            for cancel_prob, fraud_prob in zip(cancel_probs, fraud_probs)
+        ]
+
+    @timed('predict_proba')
+    def _predict_proba(self, X):
+        """Scale X and return the (cancellation, fraud) positive-class probabilities"""
         X_scaled = self.scaler.transform(X)
-        
-        cancel_prob = self.cancellation_model.predict_proba(X_scaled)[0][1]
-        fraud_prob = self.fraud_model.predict_proba(X_scaled)[0][1]
-        
-        return {
-            'cancellation_probability': float(cancel_prob),
-            'fraud_probability': float(fraud_prob),
-            'likely_cancelled': cancel_prob > 0.5,
-            'likely_fraud': fraud_prob > 0.5
-        }
+        return (self.cancellation_model.predict_proba(X_scaled)[:, 1],
+                self.fraud_model.predict_proba(X_scaled)[:, 1])
+
+    def _feature_matrix(self, orders):
+        """Encode orders into the column layout the fitted models expect"""
+        X, _ = self.encoder.encode(orders)
+        if self.feature_columns == self.encoder.feature_names:
+            return X
+        index = {name: i for i, name in enumerate(self.encoder.feature_names)}
+        return X[:, [index[col] for col in self.feature_columns]]
 
 # Bangladesh districts from your app
 BANGLADESH_DISTRICTS = [
@@ -250,3 +425,27 @@ BANGLADESH_DISTRICTS = [
     {"en": "Tangail", "bn": "টাঙ্গাইল"},
     {"en": "Thakurgaon", "bn": "ঠাকুরগাঁও"}
 ]
+
+if __name__ == "__main__":
+    # python model.py [--search] [data_path] [artifact_path]
+    # A converter feature store is memory-mapped; an NDJSON file or a directory
+    # of page files is trained on with train_streaming. --search cross-validates
+    # solver and C on a JSON file first (train_search)
+    args = sys.argv[1:]
+    search = '--search' in args
+    if search:
+        args.remove('--search')
+    data_path = args[0] if args else 'test_data.json'
+    artifact_path = args[1] if len(args) > 1 else DEFAULT_ARTIFACT_PATH
+
+    model = FraudDetectionModel()
+    if search:
+        model.train_search(data_path)
+    elif data_path.endswith(('.feather', '.arrow')):
+        model.train_from_store(data_path)
+    elif os.path.isdir(data_path) or data_path.endswith(('.ndjson', '.jsonl')):
+        model.train_streaming(data_path)
+    else:
+        model.train(data_path)
+    version = model.save(artifact_path)
+    print(f"Saved model {version} to {artifact_path}")
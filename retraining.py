@@ -0,0 +1,302 @@
+"""Hot model reload and background retraining
+
+ModelSlot holds the serving model and its compiled scorer as one immutable
+pair. A request reads the pair once and uses it to the end, so a swap never
+changes the model under an in-flight request: it finishes on the old version
+and the next request sees the new one. Each process polls the artifact
+manifest from a watcher thread and swaps when the version changes, so every
+gunicorn worker picks up a model published by any other process.
+
+Retrainer refits on newly labelled orders off the request path. It validates
+the candidate against the serving model on a held-out sample and publishes
+it (save() replaces the manifest atomically) only if it is no worse. Each
+order's split is fixed by a hash of its id, so a hold-out order is never in
+any round's training set, and both splits are reservoir-sampled to a fixed
+size however much labelled data accumulates.
+
+    python retraining.py labelled/ --interval 3600
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import weakref
+import zlib
+from collections import namedtuple
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+from artifacts import ArtifactError, read_manifest
+from features import LABEL_COLUMNS
+from metrics import registry
+from model import DEFAULT_ARTIFACT_PATH, FraudDetectionModel
+from streaming import iter_chunks
+
+# Seconds between manifest checks in each serving process; 0 disables reloading
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', '30'))
+
+# Retraining defaults
+DEFAULT_RETRAIN_INTERVAL = 3600.0
+MIN_TRAINING_ORDERS = 1000
+MAX_TRAINING_ORDERS = 200000   # orders sampled per round, hold-out included
+HOLDOUT_FRACTION = 0.2
+AUC_TOLERANCE = 0.005      # a candidate may trail the serving model by this much
+
+ServingModel = namedtuple('ServingModel', ['model', 'scorer'])
+
+
+class ModelSlot:
+    """The serving model of one process, reloaded from path when its version changes"""
+
+    def __init__(self, path=DEFAULT_ARTIFACT_PATH, reload_interval=MODEL_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.reload_errors = 0
+        self._serving = None
+        self._load_lock = threading.Lock()
+        self._watcher_pid = None
+        # A fork while another thread holds the lock would leave the child's copy locked forever
+        slot = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: slot() is not None and slot()._after_fork())
+
+    def _after_fork(self):
+        self._load_lock = threading.Lock()
+
+    def load(self):
+        """Load the artifact if nothing is served yet, without starting the reload watcher
+
+        A prefork master (gunicorn --preload) calls this so workers share the
+        loaded pages. No thread runs in the master, and each worker starts
+        its own watcher on its first current().
+        """
+        with self._load_lock:
+            if self._serving is None:
+                self._swap(FraudDetectionModel.load(self.path))
+            return self._serving
+
+    def current(self):
+        """The (model, scorer) pair to use for one whole request"""
+        if self._watcher_pid != os.getpid():
+            self._start_watcher()
+        serving = self._serving
+        if serving is None:
+            serving = self.load()
+        return serving
+
+    @property
+    def version(self):
+        serving = self._serving
+        return serving.model.version if serving else None
+
+    def swap(self, model):
+        """Serve model from now on; requests already holding the old pair keep it"""
+        with self._load_lock:
+            self._swap(model)
+
+    def _swap(self, model):
+        # Compile before publishing so readers never see a model without its scorer
+        self._serving = ServingModel(model, model.compile_scorer())
+
+    def reload_if_changed(self):
+        """Load the artifact if its manifest names another version; returns True if swapped"""
+        try:
+            version = read_manifest(self.path)['model_version']
+            if version == self.version:
+                return False
+            model = FraudDetectionModel.load(self.path)
+        except (ArtifactError, OSError, ValueError, KeyError) as e:
+            # A save in progress can remove files between manifest and arrays; retry next poll
+            self.reload_errors += 1
+            print(f"[Model Reload Error] {self.path}: {e}", file=sys.stderr)
+            return False
+        self.swap(model)
+        self.reloads += 1
+        return True
+
+    def _start_watcher(self):
+        # Threads do not survive fork(); each worker process starts its own
+        with self._load_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        if self.reload_interval > 0:
+            threading.Thread(target=self._watch, name='model-reload', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            self.reload_if_changed()
+
+
+def in_holdout(order):
+    """Whether order belongs to the validation split, the same in every round and process
+
+    The split hashes the order's order_id (or id). Orders without one are
+    hashed by their content without the labels, so relabelling an order does
+    not move it between splits.
+    """
+    key = order.get('order_id') or order.get('id')
+    if key is None:
+        key = json.dumps({k: v for k, v in order.items() if k not in LABEL_COLUMNS},
+                         sort_keys=True, default=str)
+    return zlib.crc32(str(key).encode()) % 1000 < HOLDOUT_FRACTION * 1000
+
+
+def _quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def holdout_auc(model, orders):
+    """(cancellation, fraud) ROC AUC of model on labelled orders; None where a label has one class"""
+    _, y = model.encoder.encode(orders)
+    results = model.predict_batch(orders)
+    probabilities = [
+        [r['cancellation_probability'] for r in results],
+        [r['fraud_probability'] for r in results],
+    ]
+    return tuple(
+        roc_auc_score(y[:, t], probabilities[t]) if len(np.unique(y[:, t])) == 2 else None
+        for t in range(2)
+    )
+
+
+class Retrainer:
+    """Periodically refit on labelled orders and publish candidates that pass validation
+
+    data_paths are NDJSON or JSON page files (or directories of them) with
+    was_cancelled/is_fraud labels, as accepted by train_streaming. They are
+    streamed, and at most max_orders are kept per round. A new model is
+    saved to slot.path and swapped into slot. Other processes serving from
+    the same path pick it up through their own slot's watcher.
+    """
+
+    def __init__(self, slot, data_paths, interval=DEFAULT_RETRAIN_INTERVAL,
+                 min_orders=MIN_TRAINING_ORDERS, max_orders=MAX_TRAINING_ORDERS,
+                 tolerance=AUC_TOLERANCE, seed=42):
+        self.slot = slot
+        self.data_paths = data_paths
+        self.interval = interval
+        self.min_orders = min_orders
+        self.max_orders = max_orders
+        self.tolerance = tolerance
+        self.seed = seed
+        self.last_result = None
+        self._thread = None
+
+    def _load_orders(self):
+        """(training, holdout, orders read): uniform reservoir samples of each split"""
+        rng = random.Random(self.seed)
+        holdout_size = int(self.max_orders * HOLDOUT_FRACTION)
+        limits = {False: self.max_orders - holdout_size, True: holdout_size}
+        samples = {False: [], True: []}
+        seen = {False: 0, True: 0}
+        for chunk in iter_chunks(self.data_paths, 10000):
+            for order in chunk:
+                split = in_holdout(order)
+                seen[split] += 1
+                if len(samples[split]) < limits[split]:
+                    samples[split].append(order)
+                else:
+                    j = rng.randrange(seen[split])
+                    if j < limits[split]:
+                        samples[split][j] = order
+        return samples[False], samples[True], seen[False] + seen[True]
+
+    def validate(self, candidate, current, holdout):
+        """Return (passed, reason, candidate AUCs, current AUCs)"""
+        candidate_auc = holdout_auc(candidate, holdout)
+        current_auc = holdout_auc(current, holdout) if current is not None else (None, None)
+        for name, new, old in zip(('cancellation', 'fraud'), candidate_auc, current_auc):
+            if new is None:
+                return False, f"holdout has a single {name} class", candidate_auc, current_auc
+            if old is not None and new < old - self.tolerance:
+                return False, f"{name} AUC {new:.4f} below serving {old:.4f}", candidate_auc, current_auc
+        return True, 'passed', candidate_auc, current_auc
+
+    def run_once(self):
+        """One retraining round; returns a result dict (also kept as last_result)"""
+        start = time.perf_counter()
+        training, holdout, n_orders = self._load_orders()
+        result = {'orders': n_orders, 'training_orders': len(training),
+                  'holdout_orders': len(holdout), 'published': False}
+        if n_orders < self.min_orders:
+            result['reason'] = f"only {n_orders} labelled orders, need {self.min_orders}"
+        elif not holdout or not training:
+            result['reason'] = "the hold-out split or the training split is empty"
+        else:
+            candidate = FraudDetectionModel()
+            _quiet(candidate.fit, training)
+
+            try:
+                current = self.slot.current().model
+            except ArtifactError:
+                current = None
+            passed, reason, candidate_auc, current_auc = self.validate(candidate, current, holdout)
+            result.update(reason=reason, candidate_auc=candidate_auc, serving_auc=current_auc)
+            if passed:
+                candidate.save(self.slot.path)
+                self.slot.swap(candidate)
+                result['published'] = True
+        result['version'] = self.slot.version
+        result['seconds'] = time.perf_counter() - start
+        self.last_result = result
+        return result
+
+    def start(self):
+        """Run rounds every interval seconds on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='retrainer', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def _loop(self):
+        while True:
+            try:
+                print(f"[Retrain] {self.run_once()}", file=sys.stderr)
+            except Exception as e:
+                print(f"[Retrain Error] {e}", file=sys.stderr)
+            time.sleep(self.interval)
+
+
+def model_gauges(slot):
+    """Register gauges for the serving model version and reload counts of slot"""
+    registry.gauge('fraud_model_info', 'Serving model version (always 1)', ('version',),
+                   lambda: {(slot.version,): 1} if slot.version else {})
+    registry.gauge('fraud_model_reloads', 'Model swaps picked up from the artifact', (),
+                   lambda: {(): slot.reloads})
+    registry.gauge('fraud_model_reload_errors', 'Failed model reload attempts', (),
+                   lambda: {(): slot.reload_errors})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Retrain on labelled orders and publish validated models')
+    parser.add_argument('data', nargs='+', help='NDJSON or JSON page files, or directories of them')
+    parser.add_argument('--artifact', default=DEFAULT_ARTIFACT_PATH)
+    parser.add_argument('--interval', type=float, default=DEFAULT_RETRAIN_INTERVAL,
+                        help='seconds between rounds; 0 runs one round and exits')
+    parser.add_argument('--min-orders', type=int, default=MIN_TRAINING_ORDERS)
+    parser.add_argument('--max-orders', type=int, default=MAX_TRAINING_ORDERS,
+                        help='orders sampled per round, hold-out included')
+    parser.add_argument('--tolerance', type=float, default=AUC_TOLERANCE,
+                        help='largest holdout AUC drop allowed against the serving model')
+    args = parser.parse_args()
+
+    retrainer = Retrainer(ModelSlot(args.artifact, reload_interval=0), args.data,
+                          interval=args.interval, min_orders=args.min_orders,
+                          max_orders=args.max_orders, tolerance=args.tolerance)
+    if args.interval <= 0:
+        print(retrainer.run_once())
+        return
+    retrainer._loop()
+
+
+if __name__ == "__main__":
+    main()
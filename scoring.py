@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+from metrics import timed
+
+
+def _sigmoid(z):
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class CompiledScorer:
+    """Fused scaler + logistic regression scorer built from a fitted FraudDetectionModel
+
+    The scaler is folded into the coefficients, so each model's logit is
+    bias + sum(weight[i] * x[i]) over the order's non-zero features only.
+    No DataFrame or sklearn call happens at scoring time.
+    """
+
+    def __init__(self, model):
+        if not model.is_fitted:
+            raise RuntimeError("CompiledScorer needs a fitted FraudDetectionModel")
+        self.encoder = model.encoder
+        self.version = model.version
+
+        n_columns = len(model.feature_columns)
+        # A scaler fitted with with_mean=False still has mean_, but transform ignores it
+        mean = getattr(model.scaler, 'mean_', None) if model.scaler.with_mean else None
+        scale = getattr(model.scaler, 'scale_', None)
+        mean = np.zeros(n_columns) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(n_columns) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        # 2 x F weights over the model's columns: row 0 cancellation, row 1 fraud
+        coef = np.vstack([
+            np.asarray(model.cancellation_model.coef_, dtype=np.float64)[0],
+            np.asarray(model.fraud_model.coef_, dtype=np.float64)[0],
+        ])
+        intercept = np.array([
+            model.cancellation_model.intercept_[0],
+            model.fraud_model.intercept_[0],
+        ], dtype=np.float64)
+        folded = coef / scale
+        self.bias = intercept - folded @ mean
+
+        # Re-index the weights into encoder column order; unused columns weigh 0
+        index = {name: i for i, name in enumerate(self.encoder.feature_names)}
+        self.weights = np.zeros((2, self.encoder.n_features), dtype=np.float64)
+        for j, column in enumerate(model.feature_columns):
+            self.weights[:, index[column]] = folded[:, j]
+
+        # Per-feature (cancel, fraud) weight pairs as Python floats for the single-order path
+        self._weight_pairs = [tuple(pair) for pair in self.weights.T.tolist()]
+        self._cancel_bias, self._fraud_bias = (float(b) for b in self.bias)
+
+    @timed('score')
+    def score(self, order):
+        """Return (cancellation_probability, fraud_probability) for one order"""
+        indices, values = self.encoder.active_features(order)
+        pairs = self._weight_pairs
+        cancel = self._cancel_bias
+        fraud = self._fraud_bias
+        for i, value in zip(indices, values):
+            w_cancel, w_fraud = pairs[i]
+            cancel += w_cancel * value
+            fraud += w_fraud * value
+        return _sigmoid(cancel), _sigmoid(fraud)
+
+    @timed('score_batch')
+    def score_batch(self, orders):
+        """Return an (N, 2) array of (cancellation, fraud) probabilities"""
+        # With hashed columns most of X is zeros; CSR keeps the product at O(non-zeros)
+        X, _ = self.encoder.encode(orders, sparse=self.encoder.hash_width > 0)
+        logits = X @ self.weights.T + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def predict(self, order):
+        """Same result shape as FraudDetectionModel.predict"""
+        cancel_prob, fraud_prob = self.score(order)
+        return {
+            'cancellation_probability': cancel_prob,
+            'fraud_probability': fraud_prob,
+            'likely_cancelled': cancel_prob > 0.5,
+            'likely_fraud': fraud_prob > 0.5
+        }
+
+    def predict_batch(self, orders):
+        """predict() for a list of orders, via one score_batch call"""
+        return [
+            {
+                'cancellation_probability': cancel_prob,
+                'fraud_probability': fraud_prob,
+                'likely_cancelled': cancel_prob > 0.5,
+                'likely_fraud': fraud_prob > 0.5
+            }
+            for cancel_prob, fraud_prob in self.score_batch(orders).tolist()
+        ]
@@ -0,0 +1,84 @@
+import os
+
+from converter.utils.json_codec import load, loads
+
+
+def check_model_order(order, path):
+    """Raise ValueError for an order in the converter's raw or enriched shape
+
+    FeatureEncoder reads order_value, product_category, browser and so on.
+    A raw API order (amount, cart, customer, ...) or a converter output row
+    (order_total, ...) has none of them and would silently encode as all
+    defaults with False labels.
+    """
+    if 'order_value' not in order and ('amount' in order or 'order_total' in order):
+        raise ValueError(
+            f"{path}: orders are in the converter's raw or enriched shape, not the model's. "
+            "Enrich them with 'python converter/main.py ... -f feather -o features.feather' "
+            "and train with train_from_store (python model.py features.feather)"
+        )
+    return order
+
+
+def iter_file_orders(path):
+    """Yield orders from an NDJSON file or a JSON page file
+
+    NDJSON (.ndjson/.jsonl) is read one line at a time. A JSON file holds a
+    single page, either {"orders": [...]} like test_data.json or
+    {"page": ..., "data": [...]}, so only one page is in memory at a time.
+    Orders must already carry the model's fields (see check_model_order).
+    """
+    for order in _iter_file_items(path):
+        yield check_model_order(order, path)
+
+
+def _iter_file_items(path):
+    if path.endswith(('.ndjson', '.jsonl')):
+        with open(path, 'rb') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield loads(line)
+                except ValueError:
+                    raise ValueError(f"{path}: invalid JSON on line {line_number}")
+        return
+
+    with open(path, 'rb') as f:
+        page = load(f)
+    if isinstance(page, list):
+        yield from page
+    elif 'orders' in page:
+        yield from page['orders']
+    else:
+        yield from page.get('data', [])
+
+
+def expand_paths(paths):
+    """Expand a path or list of paths; directories contribute their sorted JSON/NDJSON files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith(('.json', '.ndjson', '.jsonl'))
+            )
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def iter_chunks(paths, chunk_size):
+    """Yield lists of at most chunk_size orders across all files, in file order"""
+    chunk = []
+    for path in expand_paths(paths):
+        for order in iter_file_orders(path):
+            chunk.append(order)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
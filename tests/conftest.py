@@ -0,0 +1,27 @@
+"""Shared setup: a small synthetic model artifact, no network and no on-disk caches
+
+The environment is set before any test module imports app.py or model.py,
+which read it at import time.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix='fraud-tests-')
+os.environ['MODEL_ARTIFACT_PATH'] = os.path.join(_tmp, 'artifact')
+os.environ['MODEL_RELOAD_INTERVAL'] = '0'
+os.environ['FEATURE_CACHE_DIR'] = ''
+os.environ['ASN_CACHE_PATH'] = ''
+os.environ['ASN_PROVIDER'] = 'mmdb'
+
+from benchmarks.synthetic import train_model, write_training_file  # noqa: E402
+
+_data_path = os.path.join(_tmp, 'train.json')
+write_training_file(_data_path, 2000)
+with contextlib.redirect_stdout(io.StringIO()):
+    train_model(_data_path).save(os.environ['MODEL_ARTIFACT_PATH'])
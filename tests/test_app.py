@@ -0,0 +1,41 @@
+from app import app
+from converter.utils.json_codec import loads
+
+
+def bulk_lines(response):
+    return [loads(line) for line in response.data.splitlines()]
+
+
+def test_bulk_stream_ends_with_error_on_malformed_order():
+    orders = [{'order_value': 1000}, {'order_value': 2000}, {'order_value': None}, {'order_value': 3000}]
+    response = app.test_client().post('/predict/bulk', json=orders)
+    lines = bulk_lines(response)
+    assert response.status_code == 200
+    assert [('fraud_probability' in line) for line in lines[:2]] == [True, True]
+    assert lines[2] == {'error': 'order 3: order_value must be a number'}
+    assert len(lines) == 3
+
+
+def test_bulk_ndjson_rejects_non_object_line():
+    body = '{"order_value": 100}\n[1]\n'
+    response = app.test_client().post('/predict/bulk', data=body, content_type='application/x-ndjson')
+    lines = bulk_lines(response)
+    assert 'fraud_probability' in lines[0]
+    assert lines[1] == {'error': 'order 2: order is not a JSON object'}
+
+
+def test_score_rejects_wrongly_typed_field():
+    response = app.test_client().post('/score', json={'order_value': 'x'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'order_value must be a number'}
+
+
+def test_bulk_scoring_error_becomes_error_line(monkeypatch):
+    from app import get_fraud_model
+
+    def fail(orders):
+        raise TypeError("unsupported operand")
+
+    monkeypatch.setattr(get_fraud_model(), 'predict_batch', fail)
+    response = app.test_client().post('/predict/bulk', json=[{'order_value': 1000}])
+    assert bulk_lines(response) == [{'error': 'unsupported operand'}]
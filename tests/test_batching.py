@@ -0,0 +1,42 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from async_app import create_app
+from batching import MicroBatcher
+
+
+def test_failing_item_does_not_fail_its_batch():
+    def process(items):
+        return [10 // item for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.01)
+        return batcher, await asyncio.gather(
+            *(batcher.submit(item) for item in [1, 2, 0, 5]), return_exceptions=True
+        )
+
+    batcher, results = asyncio.run(run())
+    assert results[0] == 10 and results[1] == 5 and results[3] == 2
+    assert isinstance(results[2], ZeroDivisionError)
+    assert batcher.stats()['errors'] == 1
+    assert batcher.stats()['retried_batches'] == 1
+
+
+def test_score_mixed_good_and_bad_orders():
+    orders = [{'order_value': 1000 + i, 'address': 'Dhaka'} for i in range(10)]
+    orders[3] = {'order_value': 'x'}
+    orders[7] = {'order_value': 500, 'address': ['not', 'a', 'string']}
+
+    async def run():
+        async with TestClient(TestServer(create_app(max_wait=0.01))) as client:
+            responses = await asyncio.gather(*(client.post('/score', json=order) for order in orders))
+            return [(response.status, await response.json()) for response in responses]
+
+    results = asyncio.run(run())
+    for i, (status, body) in enumerate(results):
+        if i in (3, 7):
+            assert status == 400 and 'error' in body
+        else:
+            assert status == 200
+            assert 0 <= body['prediction']['fraud_probability'] <= 1
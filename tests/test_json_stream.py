@@ -0,0 +1,21 @@
+import io
+import json
+
+import pytest
+
+from converter.utils import json_stream
+
+
+@pytest.mark.parametrize('read_size', [1, 2, 3, 5, 7, 16])
+def test_numbers_split_across_reads(monkeypatch, read_size):
+    monkeypatch.setattr(json_stream, 'READ_SIZE', read_size)
+    items = ["x", 1234.5678, -17, 6.02e23, 1e-7, 0, {"amount": 99.5}, [1, 22, 333]]
+    text = json.dumps({"page": 1, "data": items})
+    assert list(json_stream.iter_json_items(io.StringIO(text))) == items
+    raw = list(json_stream.iter_json_items(io.StringIO(text), raw=True))
+    assert [json.loads(item) for item in raw] == items
+
+
+def test_number_at_end_of_top_level_array(monkeypatch):
+    monkeypatch.setattr(json_stream, 'READ_SIZE', 4)
+    assert list(json_stream.iter_json_items(io.StringIO("[1, 23456789]"))) == [1, 23456789]
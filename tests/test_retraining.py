@@ -0,0 +1,35 @@
+import os
+import threading
+
+from model import DEFAULT_ARTIFACT_PATH
+from retraining import ModelSlot
+
+
+def test_load_starts_no_watcher():
+    before = {thread.name for thread in threading.enumerate()}
+    slot = ModelSlot(DEFAULT_ARTIFACT_PATH, reload_interval=30)
+    assert slot.load().model.version is not None
+    assert 'model-reload' not in {thread.name for thread in threading.enumerate()} - before
+
+
+def test_child_forked_while_lock_held_can_load():
+    slot = ModelSlot(DEFAULT_ARTIFACT_PATH, reload_interval=0)
+    slot._load_lock.acquire()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            # Without the at-fork reset this blocks forever on the inherited lock
+            ok = slot.current().model.version is not None
+            os._exit(0 if ok else 1)
+    finally:
+        slot._load_lock.release()
+    for _ in range(100):
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            break
+        threading.Event().wait(0.1)
+    else:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+        raise AssertionError("forked child deadlocked on the slot lock")
+    assert os.waitstatus_to_exitcode(status) == 0